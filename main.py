@@ -25,3 +25,16 @@ app = WSGIHandler()
 
 import logging
 logging.getLogger().setLevel(logging.DEBUG)
+
+# keep the POS tagger and the sentence tokenizer loaded for the life of this
+# instance, so that requests never have to unpickle them
+from nltk.tag import pin_pos_tagger
+from spam.pipeline import pin_sentence_tokenizer
+try:
+    pin_pos_tagger()
+except LookupError, ex:
+    logging.warn('Could not load the POS tagger at instance start. %s' % ex)
+try:
+    pin_sentence_tokenizer()
+except LookupError, ex:
+    logging.warn('Could not load the sentence tokenizer at instance start. %s' % ex)
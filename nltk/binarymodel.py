@@ -0,0 +1,566 @@
+# Natural Language Toolkit: Binary Model Files
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+A pickle-free, versioned file format for trained models, which can be
+memory-mapped.  A model file holds the weights of a model as
+contiguous arrays, and its feature names, feature values and labels
+as string tables, so loading a model does not execute any code and
+does not build any large Python data structures.  When a model file
+is loaded from the local disk, its arrays are views of a read-only
+``mmap`` of the file: every process that loads the same model shares
+the same physical pages, and a freshly started process does not pay
+for unpickling.
+
+Model files are loaded with ``nltk.data.load()``, using the
+``binarymodel`` format (which is chosen automatically for files whose
+names end in ``.nbm``).  The following models can be stored:
+
+  - ``MaxentClassifier`` objects that use a
+    ``BinaryMaxentFeatureEncoding`` or a ``GISEncoding``.  They are
+    loaded as ``MappedMaxentClassifier`` objects, which give the same
+    classifications.
+  - ``ClassifierBasedPOSTagger`` objects that use such a classifier,
+    and have no backoff tagger.
+
+Use ``save_model()`` to write a model file, or ``convert()`` to
+convert an existing pickled model:
+
+    >>> from nltk.binarymodel import convert
+    >>> convert('taggers/maxent_treebank_pos_tagger/english.pickle',
+    ...         'english.nbm')                          # doctest: +SKIP
+
+The file starts with an 8 byte magic string and a little-endian
+header of two 32 bit integers: the format version and the length of
+a JSON document that describes the model and gives the data type,
+offset and shape of each array.  The arrays follow the JSON document,
+each aligned to 16 bytes; their offsets are counted from the first
+aligned position after it.
+"""
+
+import mmap
+import json
+import struct
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from nltk.probability import DictionaryProbDist
+
+from nltk.classify.maxent import (MaxentClassifier, MaxentFeatureEncodingI,
+                                  BinaryMaxentFeatureEncoding, GISEncoding)
+from nltk.tag.sequential import ClassifierBasedPOSTagger
+
+#: The string that every model file starts with.
+MAGIC = 'NLTKBM\r\n'
+
+#: The version of the model file format that is written by
+#: ``save_model()``.  ``load_model()`` rejects files with a higher
+#: version.
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<II')
+_ALIGNMENT = 16
+
+######################################################################
+#{ Keys
+######################################################################
+
+# Feature names, feature values and labels are stored as typed byte
+# strings.  Values that are equal (and so hash to the same dict entry)
+# get the same key, e.g. 'NN' and u'NN', or 1 and True.
+
+def _encode_value(value):
+    """
+    :return: The typed byte string that stands for ``value``.
+    :raise TypeError: If values of this type can't be stored.
+    """
+    if value is None:
+        return 'N'
+    elif isinstance(value, (bool, int, long)):
+        return 'I%d' % value
+    elif isinstance(value, float):
+        if value.is_integer():
+            return 'I%d' % value
+        return 'F%r' % value
+    elif isinstance(value, str):
+        return 'S' + value
+    elif isinstance(value, unicode):
+        try:
+            return 'S' + value.encode('ascii')
+        except UnicodeError:
+            return 'U' + value.encode('utf-8')
+    raise TypeError('Values of type %s can not be stored in a model '
+                    'file' % type(value).__name__)
+
+def _decode_value(key):
+    tag, body = key[:1], key[1:]
+    if tag == 'N': return None
+    elif tag == 'I': return int(body)
+    elif tag == 'F': return float(body)
+    elif tag == 'S': return body
+    elif tag == 'U': return body.decode('utf-8')
+    raise ValueError('Bad value in model file: %r' % key)
+
+def _feature_key(fname, fval):
+    """
+    :return: The key of the fid matrix row for the input-feature
+        value ``fname==fval``.
+    """
+    fname = _encode_value(fname)
+    return 'f%d:%s%s' % (len(fname), fname, _encode_value(fval))
+
+def _unseen_key(fname):
+    """
+    :return: The key of the fid matrix row for the unseen values of
+        the input-feature ``fname``.
+    """
+    return 'u' + _encode_value(fname)
+
+_ALWAYSON_KEY = 'a'
+
+def _decode_key(key):
+    """
+    :return: A tuple ``(kind, fname, fval)`` for the row key ``key``,
+        where ``kind`` is one of ``'f'``, ``'u'`` or ``'a'``.
+    """
+    if key[0] == 'f':
+        size, rest = key[1:].split(':', 1)
+        size = int(size)
+        return ('f', _decode_value(rest[:size]), _decode_value(rest[size:]))
+    elif key[0] == 'u':
+        return ('u', _decode_value(key[1:]), None)
+    return ('a', None, None)
+
+def _hash(key):
+    return zlib.crc32(key) & 0xffffffff
+
+def _string_table(strings):
+    """
+    :return: A tuple ``(offsets, data)`` of arrays, where string ``i``
+        is ``data[offsets[i]:offsets[i+1]]``.
+    """
+    offsets = numpy.zeros(len(strings)+1, '<i8')
+    offsets[1:] = numpy.cumsum([len(s) for s in strings])
+    data = numpy.fromstring(''.join(strings), 'u1')
+    return offsets, data
+
+def _hash_slots(keys):
+    """
+    :return: An open-addressing hash table (with linear probing) of
+        the indices of ``keys``; empty slots hold -1.
+    """
+    size = 8
+    while size < 2 * len(keys):
+        size *= 2
+    mask = size - 1
+    slots = numpy.empty(size, '<i4')
+    slots.fill(-1)
+    for i, key in enumerate(keys):
+        h = _hash(key) & mask
+        while slots[h] >= 0:
+            h = (h + 1) & mask
+        slots[h] = i
+    return slots
+
+class _KeyTable(object):
+    """
+    A read-only table of byte string keys, backed by the arrays of a
+    model file.  Keys are looked up through the file's hash table, so
+    no dict of the keys is ever built.
+    """
+    def __init__(self, buffer, base, offsets, slots):
+        self._buffer = buffer
+        self._base = base
+        self._offsets = offsets
+        self._slots = slots
+        self._mask = len(slots) - 1
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start = self._base + int(self._offsets[i])
+        return self._buffer[start:self._base + int(self._offsets[i+1])]
+
+    def find(self, key):
+        """
+        :return: The index of ``key``, or None if it is not in the
+            table.
+        """
+        h = _hash(key) & self._mask
+        while True:
+            i = int(self._slots[h])
+            if i < 0:
+                return None
+            if self[i] == key:
+                return i
+            h = (h + 1) & self._mask
+
+######################################################################
+#{ Mapped Models
+######################################################################
+
+class MappedMaxentFeatureEncoding(MaxentFeatureEncodingI):
+    """
+    The feature encoding of a maxent classifier that was loaded from a
+    model file.  It generates the same joint-feature vectors as the
+    ``BinaryMaxentFeatureEncoding`` (or, if ``C`` is given, the
+    ``GISEncoding``) that was saved, but its joint-features are stored
+    as a sparse fid matrix: for each row (an input-feature value, the
+    unseen values of an input-feature, or the always-on features),
+    the labels that have a joint-feature, and their ids.
+
+    Mapped encodings can't be trained.
+    """
+    def __init__(self, labels, keys, row_ptr, cols, fids, length, C=None):
+        """
+        :param labels: The list of labels.
+        :param keys: A ``_KeyTable`` of the keys of the rows.
+        :param row_ptr: The cells of row ``i`` are
+            ``row_ptr[i]:row_ptr[i+1]``.
+        :param cols: The label index of each cell.
+        :param fids: The joint-feature id of each cell.
+        :param length: The number of joint-features, not counting
+            the correction feature.
+        :param C: The correction constant, for GIS encodings.
+        """
+        self._labels = list(labels)
+        self._label_index = dict((label, i) for (i, label)
+                                 in enumerate(self._labels))
+        self._keys = keys
+        self._row_ptr = row_ptr
+        self._cols = cols
+        self._fids = fids
+        self._length = length
+        self._C = C
+        self._alwayson_row = keys.find(_ALWAYSON_KEY)
+
+    C = property(lambda self: self._C, doc="""
+        The correction constant of a GIS encoding, or None.""")
+
+    def labels(self):
+        return self._labels
+
+    def length(self):
+        if self._C is None:
+            return self._length
+        return self._length + 1
+
+    def encode_rows(self, featureset):
+        """
+        :return: The rows that hold the joint-features of the given
+            featureset, in the order that ``encode()`` generates them.
+        :rtype: list(int)
+        """
+        keys = self._keys
+        rows = []
+        for fname, fval in featureset.items():
+            try:
+                row = keys.find(_feature_key(fname, fval))
+            except TypeError:
+                row = None
+            if row is None:
+                try:
+                    row = keys.find(_unseen_key(fname))
+                except TypeError:
+                    pass
+            if row is not None:
+                rows.append(row)
+        if self._alwayson_row is not None:
+            rows.append(self._alwayson_row)
+        return rows
+
+    def encode(self, featureset, label):
+        col = self._label_index.get(label)
+        encoding = []
+        if col is not None:
+            for row in self.encode_rows(featureset):
+                start, end = self._row_ptr[row], self._row_ptr[row+1]
+                hits = numpy.flatnonzero(self._cols[start:end] == col)
+                if len(hits):
+                    encoding.append((int(self._fids[start+hits[0]]), 1))
+
+        if self._C is not None:
+            # Add the correction feature.
+            total = sum(v for (f,v) in encoding)
+            if total >= self._C:
+                raise ValueError('Correction feature is not high enough!')
+            encoding.append( (self._length, self._C-total) )
+        return encoding
+
+    def describe(self, f_id):
+        # Inherit docs.
+        if not isinstance(f_id, (int, long)):
+            raise TypeError('describe() expected an int')
+        if self._C is not None and f_id == self._length:
+            return 'Correction feature (%s)' % self._C
+        cells = numpy.flatnonzero(self._fids == f_id)
+        if not len(cells):
+            raise ValueError('Bad feature id')
+        cell = cells[0]
+        row = numpy.searchsorted(self._row_ptr, cell, 'right') - 1
+        label = self._labels[self._cols[cell]]
+        (kind, fname, fval) = _decode_key(self._keys[row])
+        if kind == 'f':
+            return '%s==%r and label is %r' % (fname, fval, label)
+        elif kind == 'u':
+            return '%s is unseen' % fname
+        return 'label is %r' % label
+
+class MappedMaxentClassifier(MaxentClassifier):
+    """
+    A maxent classifier that was loaded from a model file.  Its
+    weights are read-only, and are also stored per cell of its
+    encoding's sparse fid matrix, so that all labels are scored at
+    once without building a dense weight matrix.
+    """
+    def __init__(self, encoding, weights, cell_weights):
+        """
+        :param encoding: A ``MappedMaxentFeatureEncoding``.
+        :param weights: The feature weight vector.
+        :param cell_weights: The weight of each cell of the encoding's
+            fid matrix.
+        """
+        MaxentClassifier.__init__(self, encoding, weights)
+        self._cell_weights = cell_weights
+
+    def set_weights(self, new_weights):
+        raise ValueError('The weights of a mapped classifier are read-only')
+
+    def _vectorized(self):
+        return True
+
+    def _vectorized_prob_classify(self, featuresets):
+        encoding = self._encoding
+        indices = []
+        owners = []
+        for i, featureset in enumerate(featuresets):
+            rows = encoding.encode_rows(featureset)
+            indices.extend(rows)
+            owners.extend([i] * len(rows))
+        indices = numpy.array(indices, 'i')
+        owners = numpy.array(owners, 'i')
+
+        # Expand each row to the range of its cells.
+        starts = encoding._row_ptr[indices]
+        sizes = encoding._row_ptr[indices+1] - starts
+        offsets = numpy.cumsum(sizes) - sizes
+        cells = (numpy.arange(sizes.sum()) +
+                 numpy.repeat(starts - offsets, sizes))
+
+        # Sum the weights of the cells of each (featureset, label).
+        num_labels = len(encoding.labels())
+        size = len(featuresets) * num_labels
+        flat = (numpy.repeat(owners, sizes) * num_labels +
+                encoding._cols[cells])
+        scores = numpy.bincount(flat, self._cell_weights[cells],
+                                minlength=size)
+
+        if encoding.C is not None:
+            # Add the correction feature.
+            totals = numpy.bincount(flat, minlength=size)
+            if totals.size and totals.max() >= encoding.C:
+                raise ValueError('Correction feature is not high enough!')
+            scores = scores + self._weights[encoding._length] * (
+                encoding.C - totals)
+
+        labels = encoding.labels()
+        scores = scores.reshape(len(featuresets), num_labels)
+        return [DictionaryProbDist(dict(zip(labels, row)), log=True,
+                                   normalize=True)
+                for row in scores.tolist()]
+
+    def __getstate__(self):
+        raise TypeError('Mapped classifiers can not be pickled; use '
+                        'nltk.binarymodel.save_model() instead')
+
+######################################################################
+#{ Writing Model Files
+######################################################################
+
+def _maxent_tables(classifier):
+    """
+    :return: A tuple ``(header, arrays)`` describing a maxent
+        classifier, where ``arrays`` maps names to numpy arrays.
+    """
+    encoding = classifier._encoding
+    if isinstance(classifier, MappedMaxentClassifier):
+        raise ValueError('The classifier is already stored in a model '
+                         'file')
+    if type(encoding) not in (BinaryMaxentFeatureEncoding, GISEncoding):
+        raise ValueError('Maxent classifiers with a %s can not be stored '
+                         'in a model file' % type(encoding).__name__)
+    if not classifier._logarithmic:
+        raise ValueError('Maxent classifiers with non-logarithmic weights '
+                         'can not be stored in a model file')
+
+    # The keys of the rows of the fid matrix.
+    fid_matrix = encoding.fid_matrix()
+    keys = [None] * len(fid_matrix)
+    for (fname, fval), row in encoding._rows.items():
+        keys[row] = _feature_key(fname, fval)
+    for fname, row in encoding._unseen_rows.items():
+        keys[row] = _unseen_key(fname)
+    if encoding._alwayson_row is not None:
+        keys[encoding._alwayson_row] = _ALWAYSON_KEY
+    key_offsets, key_data = _string_table(keys)
+
+    # The fid matrix, as a sparse matrix.
+    rows, cols = numpy.nonzero(fid_matrix >= 0)
+    row_ptr = numpy.zeros(len(fid_matrix)+1, '<i8')
+    row_ptr[1:] = numpy.cumsum(numpy.bincount(rows,
+                                              minlength=len(fid_matrix)))
+    fids = fid_matrix[rows, cols]
+    weights = numpy.asarray(classifier.weights(), '<f8')
+
+    labels = [_encode_value(label) for label in encoding.labels()]
+    label_offsets, label_data = _string_table(labels)
+
+    header = {'length': BinaryMaxentFeatureEncoding.length(encoding),
+              'C': getattr(encoding, 'C', None)}
+    arrays = {'label_offsets': label_offsets,
+              'label_data': label_data,
+              'key_offsets': key_offsets,
+              'key_data': key_data,
+              'key_slots': _hash_slots(keys),
+              'row_ptr': row_ptr,
+              'cols': cols.astype('<i4'),
+              'fids': fids.astype('<i4'),
+              'weights': weights,
+              'cell_weights': weights[fids]}
+    return header, arrays
+
+def _model_tables(model):
+    if type(model) is ClassifierBasedPOSTagger:
+        if model.backoff is not None:
+            raise ValueError('Taggers with a backoff tagger can not be '
+                             'stored in a model file')
+        if not isinstance(model.classifier(), MaxentClassifier):
+            raise ValueError('Only taggers that use a maxent classifier '
+                             'can be stored in a model file')
+        header, arrays = _maxent_tables(model.classifier())
+        header['model'] = 'ClassifierBasedPOSTagger'
+        header['cutoff_prob'] = model._cutoff_prob
+        return header, arrays
+    elif isinstance(model, MaxentClassifier):
+        header, arrays = _maxent_tables(model)
+        header['model'] = 'MaxentClassifier'
+        return header, arrays
+    raise ValueError('%s objects can not be stored in a model file' %
+                     type(model).__name__)
+
+def _align(offset):
+    return offset + (-offset % _ALIGNMENT)
+
+def save_model(model, filename):
+    """
+    Write a model to a model file.
+
+    :param model: The model.  See the module documentation for the
+        models that can be stored.
+    :param filename: The name of the model file to write.
+    :raise ValueError: If the model can't be stored in a model file.
+    """
+    if numpy is None:
+        raise ValueError('Model files require numpy')
+    header, arrays = _model_tables(model)
+
+    # Array offsets are relative to the (aligned) end of the header.
+    names = sorted(arrays)
+    header['arrays'] = {}
+    offset = 0
+    for name in names:
+        header['arrays'][name] = (arrays[name].dtype.str, offset,
+                                  arrays[name].shape)
+        offset = _align(offset + arrays[name].nbytes)
+    text = json.dumps(header, sort_keys=True)
+
+    out = open(filename, 'wb')
+    try:
+        out.write(MAGIC)
+        out.write(_HEADER.pack(FORMAT_VERSION, len(text)))
+        out.write(text)
+        position = len(MAGIC) + _HEADER.size + len(text)
+        base = _align(position)
+        for name in names:
+            offset = base + header['arrays'][name][1]
+            out.write('\0' * (offset - position))
+            out.write(arrays[name].tostring())
+            position = offset + arrays[name].nbytes
+    finally:
+        out.close()
+
+def convert(resource_url, filename):
+    """
+    Convert a pickled model (or any other resource that
+    ``nltk.data.load()`` can load) to a model file.
+
+    :param resource_url: The URL of the pickled model.
+    :param filename: The name of the model file to write.
+    """
+    import nltk.data
+    save_model(nltk.data.load(resource_url, cache=False), filename)
+
+######################################################################
+#{ Reading Model Files
+######################################################################
+
+def load_model(stream):
+    """
+    Read a model from a model file.  If ``stream`` is a file on the
+    local disk, the model's arrays are views of a read-only ``mmap``
+    of the file, and are shared with every other process that maps
+    it; otherwise, the whole stream is read into memory.
+
+    :param stream: The model file, opened in binary mode.
+    :raise ValueError: If the stream is not a model file, or was
+        written by a newer version of this module.
+    """
+    if numpy is None:
+        raise ValueError('Model files require numpy')
+    if isinstance(stream, file):
+        buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        buffer = stream.read()
+
+    start = len(MAGIC) + _HEADER.size
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a model file')
+    version, size = _HEADER.unpack(buffer[len(MAGIC):start])
+    if version > FORMAT_VERSION:
+        raise ValueError('Unsupported model file version: %d' % version)
+    header = json.loads(buffer[start:start+size])
+
+    arrays = {}
+    offsets = {}
+    base = _align(start + size)
+    for name, (dtype, offset, shape) in header['arrays'].items():
+        offsets[name] = base + offset
+        count = int(numpy.prod(shape))
+        arrays[name] = numpy.frombuffer(buffer, dtype, count,
+                                        offsets[name]).reshape(shape)
+
+    labels = _KeyTable(buffer, offsets['label_data'],
+                       arrays['label_offsets'], [])
+    labels = [_decode_value(labels[i]) for i in range(len(labels))]
+    keys = _KeyTable(buffer, offsets['key_data'], arrays['key_offsets'],
+                     arrays['key_slots'])
+    encoding = MappedMaxentFeatureEncoding(
+        labels, keys, arrays['row_ptr'], arrays['cols'], arrays['fids'],
+        header['length'], header['C'])
+    model = MappedMaxentClassifier(encoding, arrays['weights'],
+                                   arrays['cell_weights'])
+
+    if header['model'] == 'ClassifierBasedPOSTagger':
+        model = ClassifierBasedPOSTagger(classifier=model,
+                                         cutoff_prob=header['cutoff_prob'])
+    elif header['model'] != 'MaxentClassifier':
+        raise ValueError('Unknown model type: %s' % header['model'])
+    return model
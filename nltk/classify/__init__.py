@@ -89,25 +89,28 @@ from nltk.classify.api import ClassifierI, MultiClassifierI
 from nltk.classify.mallet import config_mallet, call_mallet
 from nltk.classify.megam import config_megam, call_megam
 from nltk.classify.weka import WekaClassifier, config_weka
-from nltk.classify.naivebayes import NaiveBayesClassifier
+from nltk.classify.naivebayes import NaiveBayesClassifier, NaiveBayesTrainer
 from nltk.classify.positivenaivebayes import PositiveNaiveBayesClassifier
 from nltk.classify.decisiontree import DecisionTreeClassifier
 from nltk.classify.rte_classify import rte_classifier, rte_features, RTEFeatureExtractor
 from nltk.classify.util import accuracy, apply_features, log_likelihood
 
-# Conditional imports
+# Conditional imports.  numpy and scipy are only imported when a classifier
+# that uses them is; see nltk.lazyimport.
 
-try:
-    from scikitlearn import SklearnClassifier
-except ImportError:
-    pass
+from nltk.lazyimport import module_available, lazy_attributes
 
-try:
-    import numpy
+if module_available('numpy'):
     from nltk.classify.maxent import (MaxentClassifier, BinaryMaxentFeatureEncoding,
                                       TypedMaxentFeatureEncoding,
                                       ConditionalExponentialClassifier)
-    import svmlight
-    from nltk.classify.svm import SvmClassifier
-except ImportError:
-    pass
+    try:
+        import svmlight
+        from nltk.classify.svm import SvmClassifier
+    except ImportError:
+        pass
+
+if module_available('numpy') and module_available('scipy'):
+    lazy_attributes(globals(), {
+        'SklearnClassifier': 'scikitlearn',
+        })
@@ -53,11 +53,12 @@ interface.
 """
 __docformat__ = 'epytext en'
 
-import numpy
 import time
 import tempfile
 import os
+import array
 import gzip
+import math
 from collections import defaultdict
 
 from nltk.util import OrderedDict
@@ -67,6 +68,10 @@ from nltk.classify.api import ClassifierI
 from nltk.classify.util import attested_labels, CutoffChecker, accuracy, log_likelihood
 from nltk.classify.megam import call_megam, write_megam_file, parse_megam_weights
 from nltk.classify.tadm import call_tadm, write_tadm_file, parse_tadm_weights
+from nltk.lazyimport import lazy_module
+
+# numpy is imported on first use; None if it is not installed.
+numpy = lazy_module('numpy', locals(), globals())
 
 ######################################################################
 #{ Classifier Model
@@ -111,6 +116,9 @@ class MaxentClassifier(ClassifierI):
         self._weights = weights
         self._logarithmic = logarithmic
         #self._logarithmic = False
+        self._weight_matrix = None
+        """The weights of the encoding's fid matrix, built on demand
+           for vectorized inference."""
         assert encoding.length() == len(weights)
 
     def labels(self):
@@ -123,6 +131,7 @@ class MaxentClassifier(ClassifierI):
         :type new_weights: list of float
         """
         self._weights = new_weights
+        self._weight_matrix = None
         assert (self._encoding.length() == len(new_weights))
 
     def weights(self):
@@ -136,6 +145,9 @@ class MaxentClassifier(ClassifierI):
         return self.prob_classify(featureset).max()
 
     def prob_classify(self, featureset):
+        if self._vectorized():
+            return self._vectorized_prob_classify([featureset])[0]
+
         prob_dict = {}
         for label in self._encoding.labels():
             feature_vector = self._encoding.encode(featureset, label)
@@ -156,6 +168,75 @@ class MaxentClassifier(ClassifierI):
         return DictionaryProbDist(prob_dict, log=self._logarithmic,
                                   normalize=True)
 
+    def batch_classify(self, featuresets):
+        return [pdist.max() for pdist in self.batch_prob_classify(featuresets)]
+
+    def batch_prob_classify(self, featuresets):
+        if self._vectorized():
+            return self._vectorized_prob_classify(featuresets)
+        return [self.prob_classify(fs) for fs in featuresets]
+
+    def _vectorized(self):
+        """
+        :return: True if this classifier can score all labels at once,
+            using its encoding's fid matrix.
+        """
+        return (numpy is not None and
+                type(self._encoding) in _VECTORIZED_ENCODINGS)
+
+    def _vectorized_prob_classify(self, featuresets):
+        """
+        Score all labels of all the given featuresets at once.  The
+        featuresets are encoded as a sparse (CSR) matrix of rows of
+        the encoding's fid matrix, with one input-feature value looked
+        up per entry; the scores of each featureset are the column
+        sums of its rows of the weight matrix.  This gives the same
+        distributions as encoding each featureset once per label.
+        """
+        encoding = self._encoding
+        indices = []
+        indptr = [0]
+        for featureset in featuresets:
+            indices.extend(encoding.encode_rows(featureset))
+            indptr.append(len(indices))
+        indices = numpy.array(indices, 'i')
+
+        if self._logarithmic:
+            ufunc, identity = numpy.add, 0.0
+        else:
+            ufunc, identity = numpy.multiply, 1.0
+
+        if getattr(self, '_weight_matrix', None) is None:
+            # Cell -1 of the fid matrix selects the appended identity
+            # weight, so labels without a joint-feature are unaffected.
+            weights = numpy.append(numpy.asarray(self._weights, 'd'), identity)
+            self._weight_matrix = weights[encoding.fid_matrix()]
+        scores = _reduce_rows(ufunc, self._weight_matrix[indices], indptr,
+                              identity)
+
+        if isinstance(encoding, GISEncoding):
+            # Add the correction feature.
+            fired = (encoding.fid_matrix()[indices] >= 0).astype('i')
+            totals = _reduce_rows(numpy.add, fired, indptr, 0)
+            if totals.size and totals.max() >= encoding.C:
+                raise ValueError('Correction feature is not high enough!')
+            correction = self._weights[BinaryMaxentFeatureEncoding.length(encoding)]
+            if self._logarithmic:
+                scores = scores + correction * (encoding.C - totals)
+            else:
+                scores = scores * correction ** (encoding.C - totals)
+
+        labels = encoding.labels()
+        return [DictionaryProbDist(dict(zip(labels, row)),
+                                   log=self._logarithmic, normalize=True)
+                for row in scores.tolist()]
+
+    def __getstate__(self):
+        # The weight matrix is rebuilt on demand, so don't pickle it.
+        state = self.__dict__.copy()
+        state.pop('_weight_matrix', None)
+        return state
+
     def explain(self, featureset, columns=4):
         """
         Print a table showing the effect of each of the features in
@@ -217,7 +298,8 @@ class MaxentClassifier(ClassifierI):
 
     @classmethod
     def train(cls, train_toks, algorithm=None, trace=3, encoding=None,
-              labels=None, sparse=True, gaussian_prior_sigma=0, **cutoffs):
+              labels=None, sparse=True, gaussian_prior_sigma=0, workers=1,
+              **cutoffs):
         """
         Train a new maxent classifier based on the given corpus of
         training samples.  This classifier will have its weights
@@ -263,13 +345,25 @@ class MaxentClassifier(ClassifierI):
             the set of all labels attested in the training data will be
             used instead.
         :param sparse: If True, then use sparse matrices instead of
-            dense matrices.  Currently, this is only supported by
-            the scipy (optimization method) algorithms.  For other
-            algorithms, its value is ignored.
+            dense matrices.  Currently, this is supported by the scipy
+            (optimization method) algorithms, and by ``GIS`` and
+            ``IIS``, which encode the training tokens once into one
+            CSR matrix per label and then run each iteration as a few
+            numpy operations on those matrices.  For other algorithms,
+            its value is ignored.
         :param gaussian_prior_sigma: The sigma value for a gaussian
             prior on model weights.  Currently, this is supported by
             the scipy (optimization method) algorithms and ``megam``.
             For other algorithms, its value is ignored.
+        :param workers: The number of processes used to compute the
+            expected feature counts in each iteration.  If greater
+            than 1, then the training tokens are split into that many
+            shards, which are processed in parallel by a pool of
+            worker processes.  If worker processes can not be started
+            (for example, where ``multiprocessing`` is not available),
+            the counts are computed in this process.  Currently, this
+            is only supported by ``GIS`` and ``IIS``.  For other
+            algorithms, its value is ignored.
         :param cutoffs: Arguments specifying various conditions under
             which the training should be halted.  (Some of the cutoff
             conditions are not supported by some algorithms.)
@@ -300,10 +394,12 @@ class MaxentClassifier(ClassifierI):
         algorithm = algorithm.lower()
         if algorithm == 'iis':
             return train_maxent_classifier_with_iis(
-                train_toks, trace, encoding, labels, **cutoffs)
+                train_toks, trace, encoding, labels, workers, sparse,
+                **cutoffs)
         elif algorithm == 'gis':
             return train_maxent_classifier_with_gis(
-                train_toks, trace, encoding, labels, **cutoffs)
+                train_toks, trace, encoding, labels, workers, sparse,
+                **cutoffs)
         elif algorithm in cls._SCIPY_ALGS:
             return train_maxent_classifier_with_scipy(
                 train_toks, trace, encoding, labels,
@@ -330,6 +426,23 @@ class MaxentClassifier(ClassifierI):
 #: Alias for MaxentClassifier.
 ConditionalExponentialClassifier = MaxentClassifier
 
+def _reduce_rows(ufunc, values, indptr, identity):
+    """
+    Reduce the rows of ``values`` in groups with ``ufunc``, where
+    group ``i`` is ``values[indptr[i]:indptr[i+1]]`` (as in a CSR
+    matrix).  Empty groups reduce to ``identity``.
+
+    :rtype: numpy.ndarray
+    """
+    indptr = numpy.asarray(indptr)
+    result = numpy.empty((len(indptr)-1, values.shape[1]), values.dtype)
+    result.fill(identity)
+    nonempty = indptr[:-1] < indptr[1:]
+    if nonempty.any():
+        result[nonempty] = ufunc.reduceat(values, indptr[:-1][nonempty],
+                                          axis=0)
+    return result
+
 
 ######################################################################
 #{ Feature Encodings
@@ -566,6 +679,100 @@ class BinaryMaxentFeatureEncoding(MaxentFeatureEncodingI):
 
         return encoding
 
+    def encode_rows(self, featureset):
+        """
+        Given a featureset, return the rows of ``fid_matrix()`` that
+        hold its joint-features.  Together, these rows give the
+        joint-feature vectors of the featureset for every label at
+        once: ``self.encode(featureset, self.labels()[i])`` contains
+        exactly the non-negative ids in column ``i`` of the rows.
+
+        :type featureset: dict
+        :rtype: list(int)
+        """
+        try:
+            self._rows
+        except AttributeError:
+            self._build_fid_matrix()
+
+        rows = []
+        for fname, fval in featureset.items():
+            row = self._rows.get((fname, fval))
+            if row is not None:
+                rows.append(row)
+            elif fname in self._unseen_rows:
+                rows.append(self._unseen_rows[fname])
+        if self._alwayson_row is not None:
+            rows.append(self._alwayson_row)
+        return rows
+
+    def fid_matrix(self):
+        """
+        :return: A ``numpy`` array of joint-feature ids, with one
+            column for each label in ``self.labels()``, and one row
+            for each input-feature value that the encoding knows
+            about (plus one row for each unseen-value feature, and one
+            for the always-on features).  Cells with no joint-feature
+            hold -1.  Use ``encode_rows()`` to find the rows of a
+            given featureset.
+        :rtype: numpy.ndarray
+        """
+        try:
+            self._fid_matrix
+        except AttributeError:
+            self._build_fid_matrix()
+        return self._fid_matrix
+
+    def _build_fid_matrix(self):
+        if numpy is None:
+            raise ValueError('fid_matrix() requires that numpy be installed')
+
+        columns = dict((label, i) for (i, label) in enumerate(self._labels))
+        rows = {}
+        for (fname, fval, label) in self._mapping:
+            if label in columns and (fname, fval) not in rows:
+                rows[fname, fval] = len(rows)
+
+        unseen_rows = {}
+        if self._unseen:
+            for fname in self._unseen:
+                unseen_rows[fname] = len(rows) + len(unseen_rows)
+        alwayson_row = None
+        if self._alwayson:
+            alwayson_row = len(rows) + len(unseen_rows)
+
+        fids = numpy.empty((len(rows) + len(unseen_rows) +
+                            (alwayson_row is not None), len(self._labels)),
+                           'i')
+        fids.fill(-1)
+        for ((fname, fval, label), fid) in self._mapping.items():
+            if label in columns:
+                fids[rows[fname, fval], columns[label]] = fid
+        for (fname, row) in unseen_rows.items():
+            fids[row, :] = self._unseen[fname]
+        if alwayson_row is not None:
+            for (label, fid) in self._alwayson.items():
+                if label in columns:
+                    fids[alwayson_row, columns[label]] = fid
+
+        self._rows = rows
+        """dict mapping from (fname,fval) -> row of the fid matrix"""
+
+        self._unseen_rows = unseen_rows
+        """dict mapping from fname -> row of its unseen-value feature"""
+
+        self._alwayson_row = alwayson_row
+        """The row of the always-on features, or None"""
+
+        self._fid_matrix = fids
+
+    def __getstate__(self):
+        # The fid matrix is rebuilt on demand, so don't pickle it.
+        state = self.__dict__.copy()
+        for attr in ('_rows', '_unseen_rows', '_alwayson_row', '_fid_matrix'):
+            state.pop(attr, None)
+        return state
+
     def describe(self, f_id):
         # Inherit docs.
         if not isinstance(f_id, (int, long)):
@@ -706,6 +913,12 @@ class GISEncoding(BinaryMaxentFeatureEncoding):
             return BinaryMaxentFeatureEncoding.describe(self, f_id)
 
 
+#: The encodings whose ``encode_rows()`` and ``fid_matrix()`` agree
+#: with ``encode()``, and which ``MaxentClassifier`` can therefore
+#: score with vectorized inference.  Subclasses that override
+#: ``encode()`` fall back to encoding each label separately.
+_VECTORIZED_ENCODINGS = (BinaryMaxentFeatureEncoding, GISEncoding)
+
 class TadmEventMaxentFeatureEncoding(BinaryMaxentFeatureEncoding):
     def __init__(self, labels, mapping, unseen_features=False,
                        alwayson_features=False):
@@ -992,7 +1205,8 @@ class TypedMaxentFeatureEncoding(MaxentFeatureEncodingI):
 ######################################################################
 
 def train_maxent_classifier_with_gis(train_toks, trace=3, encoding=None,
-                                     labels=None, **cutoffs):
+                                     labels=None, workers=1, sparse=False,
+                                     **cutoffs):
     """
     Train a new ``ConditionalExponentialClassifier``, using the given
     training samples, using the Generalized Iterative Scaling
@@ -1039,6 +1253,21 @@ def train_maxent_classifier_with_gis(train_toks, trace=3, encoding=None,
     ll_old = None
     acc_old = None
 
+    # Split the estimation across worker processes, or run it on a
+    # sparse matrix encoding of the training tokens, if requested.
+    estimator = None
+    if workers > 1:
+        estimator = _ShardPool.start(train_toks, encoding, workers,
+                                     _shard_estimated_fcount)
+        if estimator is None and trace > 0:
+            print '  ==> Could not start worker processes'
+    if estimator is None and sparse:
+        estimator = _CSRCorpus(train_toks, encoding)
+    if estimator is not None:
+        ll_func = lambda: estimator.log_likelihood(classifier.weights())
+    else:
+        ll_func = None
+
     if trace > 0: print '  ==> Training (%d iterations)' % cutoffs['max_iter']
     if trace > 2:
         print
@@ -1049,15 +1278,23 @@ def train_maxent_classifier_with_gis(train_toks, trace=3, encoding=None,
     try:
         while True:
             if trace > 2:
-                ll = cutoffchecker.ll or log_likelihood(classifier, train_toks)
-                acc = cutoffchecker.acc or accuracy(classifier, train_toks)
+                if estimator is None:
+                    ll = (cutoffchecker.ll or
+                          log_likelihood(classifier, train_toks))
+                    acc = cutoffchecker.acc or accuracy(classifier, train_toks)
+                else:
+                    ll = estimator.log_likelihood(classifier.weights())
+                    acc = estimator.accuracy(classifier.weights())
                 iternum = cutoffchecker.iter
                 print '     %9d    %14.5f    %9.3f' % (iternum, ll, acc)
 
             # Use the model to estimate the number of times each
             # feature should occur in the training data.
-            estimated_fcount = calculate_estimated_fcount(
-                classifier, train_toks, encoding)
+            if estimator is None:
+                estimated_fcount = calculate_estimated_fcount(
+                    classifier, train_toks, encoding)
+            else:
+                estimated_fcount = estimator.counts(classifier.weights()).copy()
 
             # Take the log of estimated fcount (avoid taking log(0).)
             for fid in unattested: estimated_fcount[fid] += 1
@@ -1070,13 +1307,16 @@ def train_maxent_classifier_with_gis(train_toks, trace=3, encoding=None,
             classifier.set_weights(weights)
 
             # Check the log-likelihood & accuracy cutoffs.
-            if cutoffchecker.check(classifier, train_toks):
+            if cutoffchecker.check(classifier, train_toks, ll_func):
                 break
 
     except KeyboardInterrupt:
         print '      Training stopped: keyboard interrupt'
     except:
         raise
+    finally:
+        if estimator is not None:
+            estimator.close()
 
     if trace > 2:
         ll = log_likelihood(classifier, train_toks)
@@ -1107,13 +1347,270 @@ def calculate_estimated_fcount(classifier, train_toks, encoding):
 
     return fcount
 
+######################################################################
+#{ Count Estimators
+######################################################################
+
+class _CountEstimator(object):
+    """
+    An alternative way of computing the per-iteration counts of the
+    iterative scaling trainers: the estimated feature counts for GIS,
+    or the ``A`` matrix (before it is divided by the number of
+    training tokens) for IIS.
+
+    While computing the counts, the training tokens are classified,
+    so the log likelihood and accuracy of the same weights come for
+    free.  The results for the most recent weights are kept, so asking
+    for the counts, log likelihood and accuracy of one set of weights
+    only processes the training tokens once.  Subclasses define
+    ``_compute(weights)``, which returns ``(counts, prob, correct)``:
+    the counts, the sum of the probabilities of the tokens' labels,
+    and the number of tokens that are classified correctly.
+    """
+    _num_toks = 0
+    _weights = None
+    _result = None
+
+    def _run(self, weights):
+        if self._weights is None or not numpy.array_equal(weights,
+                                                          self._weights):
+            self._result = self._compute(weights)
+            self._weights = numpy.array(weights)
+        return self._result
+
+    def _compute(self, weights):
+        raise NotImplementedError()
+
+    def counts(self, weights):
+        return self._run(weights)[0]
+
+    def log_likelihood(self, weights):
+        """:see: ``nltk.classify.util.log_likelihood()``"""
+        return math.log(self._run(weights)[1] / self._num_toks)
+
+    def accuracy(self, weights):
+        """:see: ``nltk.classify.util.accuracy()``"""
+        return float(self._run(weights)[2]) / self._num_toks
+
+    def close(self):
+        pass
+
+class _ShardPool(_CountEstimator):
+    """
+    A pool of worker processes, each of which holds the training
+    tokens and computes the counts for one shard of them.  The counts
+    of the shards are summed to give the counts for all of
+    ``train_toks``.
+    """
+    @classmethod
+    def start(cls, train_toks, encoding, workers, task, *task_args):
+        """
+        Start a pool of worker processes.
+
+        :return: The pool, or None if worker processes can not be
+            started, in which case the counts should be computed in
+            this process.
+        """
+        try:
+            return cls(train_toks, encoding, workers, task, *task_args)
+        except (ImportError, OSError, NotImplementedError):
+            return None
+
+    def __init__(self, train_toks, encoding, workers, task, *task_args):
+        """
+        :param workers: The number of worker processes.
+        :param task: A function ``task(classifier, toks, encoding,
+            *task_args)`` returning ``(counts, prob, correct)``: the
+            counts for the tokens ``toks``, the sum of the
+            probabilities of their labels, and the number of them
+            that are classified correctly.
+        """
+        self._num_toks = len(train_toks)
+        size = max(1, int(math.ceil(self._num_toks / float(workers))))
+        self._shards = [(start, min(start+size, self._num_toks))
+                        for start in range(0, self._num_toks, size)]
+        # multiprocessing is only imported when workers are requested,
+        # and is missing on some platforms.
+        import multiprocessing
+        # The workers are given the tokens once, when they start.
+        self._pool = multiprocessing.Pool(
+            workers, _init_shard_worker,
+            (train_toks, encoding, task, task_args))
+
+    def _compute(self, weights):
+        results = self._pool.map(_run_shard_task,
+                                 [(weights, start, end)
+                                  for (start, end) in self._shards])
+        counts = sum(counts for (counts, prob, correct) in results)
+        prob = sum(prob for (counts, prob, correct) in results)
+        correct = sum(correct for (counts, prob, correct) in results)
+        return counts, prob, correct
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+#: The state of a worker process of a ``_ShardPool``.
+_shard_worker = {}
+
+def _init_shard_worker(train_toks, encoding, task, task_args):
+    _shard_worker.update(train_toks=train_toks, encoding=encoding,
+                         task=task, task_args=task_args)
+
+def _run_shard_task((weights, start, end)):
+    encoding = _shard_worker['encoding']
+    classifier = ConditionalExponentialClassifier(encoding, weights)
+    toks = _shard_worker['train_toks'][start:end]
+    return _shard_worker['task'](classifier, toks, encoding,
+                                 *_shard_worker['task_args'])
+
+def _shard_estimated_fcount(classifier, train_toks, encoding):
+    """
+    The ``_ShardPool`` task for GIS: the estimated feature counts of
+    ``calculate_estimated_fcount()``.
+    """
+    fcount = numpy.zeros(encoding.length(), 'd')
+    prob_sum = 0.0
+    correct = 0
+
+    for tok, label in train_toks:
+        pdist = classifier.prob_classify(tok)
+        prob_sum += pdist.prob(label)
+        correct += (pdist.max() == label)
+        for label in pdist.samples():
+            prob = pdist.prob(label)
+            for (fid, fval) in encoding.encode(tok, label):
+                fcount[fid] += prob*fval
+
+    return fcount, prob_sum, correct
+
+def _shard_nf_fcount(classifier, train_toks, encoding, nfmap):
+    """
+    The ``_ShardPool`` task for IIS: the ``A`` matrix of
+    ``calculate_deltas()``, before it is divided by the number of
+    training tokens.
+    """
+    A = numpy.zeros((len(nfmap), encoding.length()), 'd')
+    prob_sum = 0.0
+    correct = 0
+
+    for tok, label in train_toks:
+        dist = classifier.prob_classify(tok)
+        prob_sum += dist.prob(label)
+        correct += (dist.max() == label)
+
+        for label in encoding.labels():
+            feature_vector = encoding.encode(tok,label)
+            nf = sum([val for (id, val) in feature_vector])
+            for (id, val) in feature_vector:
+                A[nfmap[nf], id] += dist.prob(label) * val
+
+    return A, prob_sum, correct
+
+class _CSRCorpus(_CountEstimator):
+    """
+    The training tokens, encoded once into one CSR (compressed sparse
+    row) matrix per label, with a row for each token and a column for
+    each joint-feature.  The counts of each iteration are then
+    computed with a few numpy operations on these matrices, instead of
+    encoding every token again.  If ``nfmap`` is given, the counts are
+    the ``A`` matrix for IIS; otherwise, they are the estimated
+    feature counts for GIS.
+    """
+    def __init__(self, train_toks, encoding, nfmap=None):
+        self._length = encoding.length()
+        self._num_toks = len(train_toks)
+        self._labels = list(encoding.labels())
+
+        # The index of each token's label, or -1 for unknown labels.
+        label_index = dict((label, i) for (i, label)
+                           in enumerate(self._labels))
+        self._gold = numpy.array([label_index.get(label, -1)
+                                  for (tok, label) in train_toks], 'i')
+
+        # Rank the labels, to break ties the way DictionaryProbDist.max()
+        # does: in favor of the greatest label.
+        self._ranked = numpy.array(sorted(range(len(self._labels)),
+                                          key=self._labels.__getitem__,
+                                          reverse=True), 'i')
+
+        # The CSR matrices, as (rows, indices, data) tuples, where
+        # rows[j] is the row of the j-th non-zero value; it is
+        # expanded from the usual row pointer array, since all the
+        # sums are computed with numpy.bincount().
+        self._matrices = []
+        for label in self._labels:
+            indptr = array.array('i', [0])
+            indices = array.array('i')
+            data = array.array('d')
+            for (tok, _) in train_toks:
+                for (fid, fval) in encoding.encode(tok, label):
+                    indices.append(fid)
+                    data.append(fval)
+                indptr.append(len(indices))
+            rows = numpy.repeat(numpy.arange(self._num_toks, dtype='i'),
+                                numpy.diff(numpy.array(indptr, 'i')))
+            self._matrices.append((rows, numpy.array(indices, 'i'),
+                                   numpy.array(data, 'd')))
+
+        # For IIS, the cell of the A matrix that each non-zero value
+        # is added to: A[nfmap[nf], fid], where nf is the sum of the
+        # values in its row.
+        self._cells = None
+        if nfmap is not None:
+            self._num_nf = len(nfmap)
+            self._cells = []
+            for (rows, indices, data) in self._matrices:
+                nf = numpy.bincount(rows, data, self._num_toks)
+                nf_index = numpy.array([nfmap[v] for v in nf.tolist()], 'l')
+                self._cells.append(nf_index[rows] * self._length + indices)
+
+    def _compute(self, weights):
+        weights = numpy.asarray(weights, 'd')
+
+        # The log (base 2) score of each label for each token.
+        scores = numpy.empty((len(self._labels), self._num_toks), 'd')
+        for (i, (rows, indices, data)) in enumerate(self._matrices):
+            scores[i] = numpy.bincount(rows, weights[indices] * data,
+                                       self._num_toks)
+
+        # Normalize the scores to probabilities.  Tokens with no label
+        # that has a finite score get a uniform distribution.
+        best = scores.max(axis=0)
+        unscored = (best == numpy.NINF)
+        best[unscored] = 0
+        probs = 2 ** (scores - best)
+        probs[:, unscored] = 1
+        probs /= probs.sum(axis=0)
+
+        if self._cells is None:
+            counts = numpy.zeros(self._length, 'd')
+            for (i, (rows, indices, data)) in enumerate(self._matrices):
+                counts += numpy.bincount(indices, probs[i, rows] * data,
+                                         self._length)
+        else:
+            size = self._num_nf * self._length
+            counts = numpy.zeros(size, 'd')
+            for (i, (rows, indices, data)) in enumerate(self._matrices):
+                counts += numpy.bincount(self._cells[i],
+                                         probs[i, rows] * data, size)
+            counts = counts.reshape((self._num_nf, self._length))
+
+        known = self._gold >= 0
+        prob_sum = probs[self._gold[known], known.nonzero()[0]].sum()
+        guesses = self._ranked[probs[self._ranked].argmax(axis=0)]
+        correct = int((guesses == self._gold).sum())
+
+        return counts, prob_sum, correct
+
 
 ######################################################################
 #{ Classifier Trainer: Improved Iterative Scaling
 ######################################################################
 
 def train_maxent_classifier_with_iis(train_toks, trace=3, encoding=None,
-                                     labels=None, **cutoffs):
+                                     labels=None, workers=1, sparse=False,
+                                     **cutoffs):
     """
     Train a new ``ConditionalExponentialClassifier``, using the given
     training samples, using the Improved Iterative Scaling algorithm.
@@ -1152,6 +1649,22 @@ def train_maxent_classifier_with_iis(train_toks, trace=3, encoding=None,
     for fid in unattested: weights[fid] = numpy.NINF
     classifier = ConditionalExponentialClassifier(encoding, weights)
 
+    # Split the A matrix computation across worker processes, or run
+    # it on a sparse matrix encoding of the training tokens, if
+    # requested.
+    estimator = None
+    if workers > 1:
+        estimator = _ShardPool.start(train_toks, encoding, workers,
+                                     _shard_nf_fcount, nfmap)
+        if estimator is None and trace > 0:
+            print '  ==> Could not start worker processes'
+    if estimator is None and sparse:
+        estimator = _CSRCorpus(train_toks, encoding, nfmap)
+    if estimator is not None:
+        ll_func = lambda: estimator.log_likelihood(classifier.weights())
+    else:
+        ll_func = None
+
     if trace > 0: print '  ==> Training (%d iterations)' % cutoffs['max_iter']
     if trace > 2:
         print
@@ -1167,15 +1680,25 @@ def train_maxent_classifier_with_iis(train_toks, trace=3, encoding=None,
     try:
         while True:
             if trace > 2:
-                ll = cutoffchecker.ll or log_likelihood(classifier, train_toks)
-                acc = cutoffchecker.acc or accuracy(classifier, train_toks)
+                if estimator is None:
+                    ll = (cutoffchecker.ll or
+                          log_likelihood(classifier, train_toks))
+                    acc = cutoffchecker.acc or accuracy(classifier, train_toks)
+                else:
+                    ll = estimator.log_likelihood(classifier.weights())
+                    acc = estimator.accuracy(classifier.weights())
                 iternum = cutoffchecker.iter
                 print '     %9d    %14.5f    %9.3f' % (iternum, ll, acc)
 
             # Calculate the deltas for this iteration, using Newton's method.
-            deltas = calculate_deltas(
-                train_toks, classifier, unattested, empirical_ffreq,
-                nfmap, nfarray, nftranspose, encoding)
+            if estimator is None:
+                deltas = calculate_deltas(
+                    train_toks, classifier, unattested, empirical_ffreq,
+                    nfmap, nfarray, nftranspose, encoding)
+            else:
+                A = estimator.counts(classifier.weights()) / len(train_toks)
+                deltas = solve_deltas(A, unattested, empirical_ffreq,
+                                      nfarray, nftranspose, encoding)
 
             # Use the deltas to update our weights.
             weights = classifier.weights()
@@ -1183,13 +1706,16 @@ def train_maxent_classifier_with_iis(train_toks, trace=3, encoding=None,
             classifier.set_weights(weights)
 
             # Check the log-likelihood & accuracy cutoffs.
-            if cutoffchecker.check(classifier, train_toks):
+            if cutoffchecker.check(classifier, train_toks, ll_func):
                 break
 
     except KeyboardInterrupt:
         print '      Training stopped: keyboard interrupt'
     except:
         raise
+    finally:
+        if estimator is not None:
+            estimator.close()
 
 
     if trace > 2:
@@ -1289,14 +1815,6 @@ def calculate_deltas(train_toks, classifier, unattested, ffreq_empirical,
     :param nftranspose: The transpose of ``nfarray``
     :type nftranspose: array(float)
     """
-    # These parameters control when we decide that we've
-    # converged.  It probably should be possible to set these
-    # manually, via keyword arguments to train.
-    NEWTON_CONVERGE = 1e-12
-    MAX_NEWTON = 300
-
-    deltas = numpy.ones(encoding.length(), 'd')
-
     # Precompute the A matrix:
     # A[nf][id] = sum ( p(fs) * p(label|fs) * f(fs,label) )
     # over all label,fs s.t. num_features[label,fs]=nf
@@ -1315,6 +1833,30 @@ def calculate_deltas(train_toks, classifier, unattested, ffreq_empirical,
                 A[nfmap[nf], id] += dist.prob(label) * val
     A /= len(train_toks)
 
+    return solve_deltas(A, unattested, ffreq_empirical, nfarray,
+                        nftranspose, encoding)
+
+def solve_deltas(A, unattested, ffreq_empirical, nfarray, nftranspose,
+                 encoding):
+    """
+    Solve for the update values of the classifier weights for this
+    iteration of IIS, given the ``A`` matrix::
+
+      A[nf][id] = sum ( p(fs) * p(label|fs) * f(fs,label) )
+
+    over all label,fs s.t. num_features[label,fs]=nf.
+
+    :see: ``calculate_deltas()``, which computes ``A`` from the
+        training tokens and calls this function.
+    """
+    # These parameters control when we decide that we've
+    # converged.  It probably should be possible to set these
+    # manually, via keyword arguments to train.
+    NEWTON_CONVERGE = 1e-12
+    MAX_NEWTON = 300
+
+    deltas = numpy.ones(encoding.length(), 'd')
+
     # Iteratively solve for delta.  Use the following variables:
     #   - nf_delta[x][y] = nfarray[x] * delta[y]
     #   - exp_nf_delta[x][y] = exp(nf[x] * delta[y])
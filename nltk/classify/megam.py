@@ -31,10 +31,10 @@ import os.path
 import subprocess
 
 from nltk.internals import find_binary
-try:
-    import numpy
-except ImportError:
-    numpy = None
+from nltk.lazyimport import lazy_module
+
+# numpy is imported on first use; None if it is not installed.
+numpy = lazy_module('numpy', locals(), globals())
 
 ######################################################################
 #{ Configuration
@@ -80,6 +80,7 @@ class NaiveBayesClassifier(ClassifierI):
         self._label_probdist = label_probdist
         self._feature_probdist = feature_probdist
         self._labels = label_probdist.samples()
+        self._compiled = None
 
     def labels(self):
         return self._labels
@@ -88,6 +89,9 @@ class NaiveBayesClassifier(ClassifierI):
         return self.prob_classify(featureset).max()
 
     def prob_classify(self, featureset):
+        if getattr(self, '_compiled', None) is not None:
+            return self._compiled_prob_classify(featureset)
+
         # Discard any feature names that we've never seen before.
         # Otherwise, we'll just assign a probability of 0 to
         # everything.
@@ -120,6 +124,69 @@ class NaiveBayesClassifier(ClassifierI):
 
         return DictionaryProbDist(logprob, normalize=True, log=True)
 
+    def compile(self):
+        """
+        Flatten the feature probability distributions into tables of
+        log probabilities, with one entry per label for each feature
+        value that was seen in training.  Once the classifier is
+        compiled, ``prob_classify()`` looks up one table entry per
+        feature, rather than a ``ProbDistI`` per label and feature,
+        and returns identical results.
+
+        The tables are not updated if the probability distributions
+        change later; call ``compile()`` again in that case.
+
+        :return: This classifier.
+        :rtype: NaiveBayesClassifier
+        """
+        fnames = set()
+        fvals = set()
+        for (label, fname), probdist in self._feature_probdist.items():
+            fnames.add(fname)
+            for fval in probdist.samples():
+                fvals.add( (fname, fval) )
+
+        label_logprobs = [self._label_probdist.logprob(label)
+                          for label in self._labels]
+        feature_logprobs = dict((feature, self._feature_logprobs(*feature))
+                                for feature in fvals)
+        self._compiled = (label_logprobs, fnames, feature_logprobs)
+        return self
+
+    def _feature_logprobs(self, fname, fval):
+        """
+        :return: The log probability of ``fname=fval`` given each
+            label, in the order of ``self._labels``.
+        :rtype: list(float)
+        """
+        logprobs = []
+        for label in self._labels:
+            if (label, fname) in self._feature_probdist:
+                feature_probs = self._feature_probdist[label,fname]
+                logprobs.append(feature_probs.logprob(fval))
+            else:
+                logprobs.append(sum_logs([])) # = -INF.
+        return logprobs
+
+    def _compiled_prob_classify(self, featureset):
+        label_logprobs, fnames, feature_logprobs = self._compiled
+
+        # Sum the log probabilities in the same order as the
+        # uncompiled prob_classify(), so that the results are the same.
+        logprobs = label_logprobs
+        for (fname, fval) in featureset.copy().items():
+            # Discard any feature names that we've never seen before.
+            if fname not in fnames:
+                continue
+            row = feature_logprobs.get( (fname, fval) )
+            if row is None:
+                # A value that was not seen in training.
+                row = self._feature_logprobs(fname, fval)
+            logprobs = [lp + flp for (lp, flp) in zip(logprobs, row)]
+
+        return DictionaryProbDist(dict(zip(self._labels, logprobs)),
+                                  normalize=True, log=True)
+
     def show_most_informative_features(self, n=10):
         # Determine the most relevant features, and display them.
         cpdist = self._feature_probdist
@@ -180,11 +247,70 @@ class NaiveBayesClassifier(ClassifierI):
         """
         :param labeled_featuresets: A list of classified featuresets,
             i.e., a list of tuples ``(featureset, label)``.
+        :see: ``NaiveBayesTrainer``, to train a classifier
+            incrementally.
         """
-        label_freqdist = FreqDist()
-        feature_freqdist = defaultdict(FreqDist)
-        feature_values = defaultdict(set)
-        fnames = set()
+        trainer = NaiveBayesTrainer(estimator)
+        trainer.train(labeled_featuresets)
+        return trainer._classifier(copy=False)
+
+##//////////////////////////////////////////////////////
+##  Incremental Training
+##//////////////////////////////////////////////////////
+
+class NaiveBayesTrainer(object):
+    """
+    Trains a ``NaiveBayesClassifier`` incrementally.  The trainer keeps
+    the feature counts of all the classified featuresets it has been
+    given so far, so training data can be added in batches as it
+    arrives, instead of retraining from scratch:
+
+        >>> from nltk.classify.naivebayes import NaiveBayesTrainer
+        >>> trainer = NaiveBayesTrainer()
+        >>> trainer.train([({'word': 'cheap'}, 'spam'),
+        ...                ({'word': 'meeting'}, 'ham')])
+        >>> trainer.train([({'word': 'cheap'}, 'spam')])
+        >>> trainer.classifier().classify({'word': 'cheap'})
+        'spam'
+
+    Trainers that counted different parts of the training data (e.g.,
+    in separate processes) can be combined with ``merge()``.  A
+    classifier can be built from the counts at any time with
+    ``classifier()``; it is not affected by later training.
+    """
+    def __init__(self, estimator=ELEProbDist):
+        """
+        :param estimator: The ``ProbDistI`` class used to build the
+            probability distributions of the classifiers, from
+            ``FreqDist``\ s.
+        """
+        self._estimator = estimator
+
+        self._label_freqdist = FreqDist()
+        """freq(label)"""
+
+        self._feature_freqdist = defaultdict(FreqDist)
+        """dict mapping from (label, fname) -> freq(fval|label, fname)"""
+
+        self._feature_values = defaultdict(set)
+        """dict mapping from fname -> the set of values seen for it"""
+
+        self._fnames = set()
+        """The set of all feature names seen."""
+
+    def train(self, labeled_featuresets):
+        """
+        Add the feature counts of some classified featuresets.  The
+        featuresets are counted one at a time, so
+        ``labeled_featuresets`` may be a generator.
+
+        :param labeled_featuresets: A list of classified featuresets,
+            i.e., a list of tuples ``(featureset, label)``.
+        """
+        label_freqdist = self._label_freqdist
+        feature_freqdist = self._feature_freqdist
+        feature_values = self._feature_values
+        fnames = self._fnames
 
         # Count up how many times each feature value occurred, given
         # the label and featurename.
@@ -198,6 +324,46 @@ class NaiveBayesClassifier(ClassifierI):
                 # Keep a list of all feature names.
                 fnames.add(fname)
 
+    def merge(self, other):
+        """
+        Add the feature counts of another trainer to this one.
+
+        :type other: NaiveBayesTrainer
+        """
+        self._label_freqdist.update(other._label_freqdist)
+        for (key, freqdist) in other._feature_freqdist.items():
+            self._feature_freqdist[key].update(freqdist)
+        for (fname, fvals) in other._feature_values.items():
+            self._feature_values[fname].update(fvals)
+        self._fnames.update(other._fnames)
+
+    def classifier(self):
+        """
+        :return: A new classifier, trained on all the classified
+            featuresets counted so far.
+        :rtype: NaiveBayesClassifier
+        """
+        return self._classifier(copy=True)
+
+    def _classifier(self, copy):
+        """
+        Build a classifier from the counts.  Unless ``copy`` is true,
+        the counts are modified and shared with the classifier, so the
+        trainer can not be used any more.
+        """
+        label_freqdist = self._label_freqdist
+        feature_freqdist = self._feature_freqdist
+        feature_values = self._feature_values
+        fnames = self._fnames
+        if copy:
+            label_freqdist = label_freqdist.copy()
+            feature_freqdist = defaultdict(FreqDist,
+                [(key, freqdist.copy())
+                 for (key, freqdist) in feature_freqdist.items()])
+            feature_values = defaultdict(set,
+                [(fname, set(fvals))
+                 for (fname, fvals) in feature_values.items()])
+
         # If a feature didn't have a value given for an instance, then
         # we assume that it gets the implicit value 'None.'  This loop
         # counts up the number of 'missing' feature values for each
@@ -211,12 +377,13 @@ class NaiveBayesClassifier(ClassifierI):
                 feature_values[fname].add(None)
 
         # Create the P(label) distribution
-        label_probdist = estimator(label_freqdist)
+        label_probdist = self._estimator(label_freqdist)
 
         # Create the P(fval|label, fname) distribution
         feature_probdist = {}
         for ((label, fname), freqdist) in feature_freqdist.items():
-            probdist = estimator(freqdist, bins=len(feature_values[fname]))
+            probdist = self._estimator(freqdist,
+                                       bins=len(feature_values[fname]))
             feature_probdist[label,fname] = probdist
 
         return NaiveBayesClassifier(label_probdist, feature_probdist)
@@ -107,13 +107,22 @@ class CutoffChecker(object):
         self.acc = None
         self.iter = 1
 
-    def check(self, classifier, train_toks):
+    def check(self, classifier, train_toks, ll_func=None):
+        """
+        :param ll_func: A function that returns the log likelihood of
+            ``classifier`` on ``train_toks``, which is used instead of
+            ``log_likelihood()`` if given (e.g., by trainers that
+            compute it in parallel).
+        """
         cutoffs = self.cutoffs
         self.iter += 1
         if 'max_iter' in cutoffs and self.iter >= cutoffs['max_iter']:
             return True # iteration cutoff.
 
-        new_ll = nltk.classify.util.log_likelihood(classifier, train_toks)
+        if ll_func is None:
+            new_ll = nltk.classify.util.log_likelihood(classifier, train_toks)
+        else:
+            new_ll = ll_func()
         if math.isnan(new_ll):
             return True
 
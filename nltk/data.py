@@ -40,6 +40,7 @@ import urllib2
 import zipfile
 import codecs
 
+from collections import OrderedDict
 from gzip import GzipFile, READ as GZ_READ, WRITE as GZ_WRITE
 
 try:
@@ -376,9 +377,24 @@ class ZipFilePathPointer(PathPointer):
 
 # Don't use a weak dictionary, because in the common case this
 # causes a lot more reloading that necessary.
-_resource_cache = {}
+_resource_cache = OrderedDict()
 """A dictionary used to cache resources so that they won't
-   need to be loaded more than once."""
+   need to be loaded more than once.  Entries are kept in order of
+   use, least recently used first."""
+
+_pinned_resources = {}
+"""A dictionary of resources that have been pinned with ``pin()``.
+   Pinned resources are never evicted from the cache."""
+
+_resource_sizes = {}
+"""A dictionary mapping each cached resource URL to the size, in
+   bytes, of the file it was loaded from."""
+
+cache_limit = None
+"""The maximum total size, in bytes, of the files that cached
+   resources were loaded from.  When the cache grows beyond this
+   limit, the least recently used unpinned resources are evicted.
+   If None, then the cache is unbounded."""
 
 def find(resource_name):
     """
@@ -519,6 +535,8 @@ FORMATS = {
             "parameter",
     'val': "A semantic valuation, parsed by nltk.sem.parse_valuation().",
     'raw': "The raw (byte string) contents of a file.",
+    'binarymodel': "A trained model, stored in a memory-mappable model "
+            "file by nltk.binarymodel.save_model().",
     }
 
 #: A dictionary mapping from file extensions to format names, used
@@ -532,7 +550,8 @@ AUTO_FORMATS = {
     'fcfg': 'fcfg',
     'fol': 'fol',
     'logic': 'logic',
-    'val': 'val'}
+    'val': 'val',
+    'nbm': 'binarymodel'}
 
 def load(resource_url, format='auto', cache=True, verbose=False,
          logic_parser=None, fstruct_parser=None):
@@ -549,6 +568,7 @@ def load(resource_url, format='auto', cache=True, verbose=False,
       - ``logic`` (Logical formulas to be parsed by the given logic_parser)
       - ``val`` (valuation of First Order Logic model)
       - ``raw``
+      - ``binarymodel`` (memory-mapped models; see ``nltk.binarymodel``)
 
     If no format is specified, ``load()`` will attempt to determine a
     format based on the resource name's file extension.  If that
@@ -561,9 +581,10 @@ def load(resource_url, format='auto', cache=True, verbose=False,
     :type cache: bool
     :param cache: If true, add this resource to a cache.  If load()
         finds a resource in its cache, then it will return it from the
-        cache rather than loading it.  The cache uses weak references,
-        so a resource wil automatically be expunged from the cache
-        when no more objects are using it.
+        cache rather than loading it.  If ``cache_limit`` is set, then
+        the least recently used resources are expunged from the cache
+        when it grows beyond that limit, unless they have been pinned
+        with ``pin()``.
     :type verbose: bool
     :param verbose: If true, print a message when loading a resource.
         Messages are not displayed when a resource is retrieved from
@@ -577,7 +598,7 @@ def load(resource_url, format='auto', cache=True, verbose=False,
     """
     # If we've cached the resource, then just return it.
     if cache:
-        resource_val = _resource_cache.get(resource_url)
+        resource_val = _cache_get(resource_url)
         if resource_val is not None:
             if verbose:
                 print '<<Using cached copy of %s>>' % (resource_url,)
@@ -624,18 +645,18 @@ def load(resource_url, format='auto', cache=True, verbose=False,
         resource_val = nltk.sem.parse_valuation(_open(resource_url).read())
     elif format == 'raw':
         resource_val = _open(resource_url).read()
+    elif format == 'binarymodel':
+        from nltk.binarymodel import load_model
+        resource_val = load_model(_open(resource_url))
     else:
         assert format not in FORMATS
         raise ValueError('Unknown format type!')
 
     # If requested, add it to the cache.
     if cache:
-        try:
-            _resource_cache[resource_url] = resource_val
-        except TypeError:
-            # We can't create weak references to some object types, like
-            # strings and tuples.  For now, just don't cache them.
-            pass
+        _resource_cache[resource_url] = resource_val
+        _resource_sizes[resource_url] = _resource_size(resource_url)
+        _evict()
 
     return resource_val
 
@@ -660,11 +681,103 @@ def show_cfg(resource_url, escape='##'):
 
 def clear_cache():
     """
-    Remove all objects from the resource cache.
+    Remove all objects from the resource cache, except for those
+    that have been pinned with ``pin()``.
     :see: load()
     """
+    for resource_url in _resource_cache:
+        del _resource_sizes[resource_url]
     _resource_cache.clear()
 
+def pin(resource_url, format='auto', verbose=False):
+    """
+    Load a given resource, and pin it in the resource cache.  A pinned
+    resource is kept loaded for the life of the process: it is never
+    evicted when the cache grows beyond ``cache_limit``, and it is not
+    removed by ``clear_cache()``.  Use ``unpin()`` to release it.
+
+    This is typically called once at process start, for resources
+    that are expensive to load and are used by every request, such as
+    a part of speech tagger.
+
+    :type resource_url: str
+    :param resource_url: A URL specifying where the resource should be
+        loaded from.  The default protocol is "nltk:", which searches
+        for the file in the the NLTK data package.
+    :return: The pinned resource.
+    """
+    resource_val = _cache_get(resource_url)
+    if resource_val is None:
+        resource_val = load(resource_url, format, cache=False,
+                            verbose=verbose)
+        _resource_sizes[resource_url] = _resource_size(resource_url)
+    else:
+        _resource_cache.pop(resource_url, None)
+
+    _pinned_resources[resource_url] = resource_val
+    _evict()
+    return resource_val
+
+def unpin(resource_url):
+    """
+    Release a resource that was pinned with ``pin()``.  The resource
+    remains in the cache as its most recently used entry, and may be
+    evicted like any other cached resource.
+
+    :type resource_url: str
+    :param resource_url: The URL that the resource was pinned with.
+    """
+    if resource_url in _pinned_resources:
+        _resource_cache[resource_url] = _pinned_resources.pop(resource_url)
+        _evict()
+
+def cache_size():
+    """
+    Return the total size, in bytes, of the files that the resources
+    in the cache (including pinned resources) were loaded from.
+    :see: cache_limit
+    """
+    return sum(_resource_sizes.values())
+
+def _cache_get(resource_url):
+    """
+    Return the cached copy of a resource, or None if it is not cached.
+    Unpinned resources are marked as the most recently used entry.
+    """
+    if resource_url in _pinned_resources:
+        return _pinned_resources[resource_url]
+    resource_val = _resource_cache.pop(resource_url, None)
+    if resource_val is not None:
+        _resource_cache[resource_url] = resource_val
+    return resource_val
+
+def _evict():
+    """
+    Remove the least recently used unpinned resources from the cache,
+    until its size is within ``cache_limit``.
+    """
+    if cache_limit is None:
+        return
+    size = cache_size()
+    while size > cache_limit and _resource_cache:
+        resource_url, resource_val = _resource_cache.popitem(last=False)
+        size -= _resource_sizes.pop(resource_url)
+
+def _resource_size(resource_url):
+    """
+    Return the size, in bytes, of the file that a resource is loaded
+    from; or 0 if it can not be determined, e.g. for "http:" URLs.
+    """
+    protocol, path = re.match('(?:(\w+):)?(.*)', resource_url).groups()
+    try:
+        if protocol is None or protocol.lower() == 'nltk':
+            return find(path).file_size()
+        elif protocol.lower() == 'file':
+            return os.path.getsize(path)
+    except (LookupError, IOError, OSError):
+        pass
+    return 0
+
 def _open(resource_url):
     """
     Helper function that returns an open file object for a resource,
@@ -1188,5 +1301,6 @@ class SeekableUnicodeStreamReader(object):
 __all__ = ['path', 'PathPointer', 'FileSystemPathPointer', 'BufferedGzipFile',
            'GzipFileSystemPathPointer', 'GzipFileSystemPathPointer',
            'find', 'retrieve', 'FORMATS', 'AUTO_FORMATS', 'load',
-           'show_cfg', 'clear_cache', 'LazyLoader', 'OpenOnDemandZipFile',
+           'show_cfg', 'clear_cache', 'pin', 'unpin', 'cache_size',
+           'cache_limit', 'LazyLoader', 'OpenOnDemandZipFile',
            'GzipFileSystemPathPointer', 'SeekableUnicodeStreamReader']
@@ -15,6 +15,14 @@
     or contact the author. All Rights Reserved.
 """
 
+import __builtin__
+import atexit
+import imp
+import os
+import sys
+import time
+import types
+
 ### Constants
 
 _debug = 0
@@ -139,3 +147,217 @@ class LazyModule:
 
     def __repr__(self):
         return "<LazyModule '%s'>" % self.__name__
+
+def module_available(name):
+
+    """ Return whether the top-level module name can be imported,
+        without importing it.
+
+    """
+    try:
+        imp.find_module(name)
+    except ImportError:
+        return False
+    return True
+
+def lazy_module(name, locals, globals=None):
+
+    """ Return a LazyModule wrapping the top-level module name, or None
+        if the module can't be found.  This is meant for optional
+        dependencies:
+
+        numpy = lazy_module('numpy', locals(), globals())
+
+    """
+    if not module_available(name):
+        return None
+    return LazyModule(name, locals, globals)
+
+### Lazy packages
+
+class LazyPackage(types.ModuleType):
+
+    """ Package module whose listed attributes are imported on demand.
+
+        A package's __init__ module calls lazy_attributes() at its end,
+        which replaces the package in sys.modules with a LazyPackage
+        holding the same namespace.  Each listed submodule is bound in
+        the package namespace to a LazyModule, and each listed attribute
+        (usually a class from a backend submodule that pulls in heavy
+        dependencies such as numpy) is read from its submodule's
+        LazyModule when it is first requested, e.g. by "from nltk.tag
+        import TnT" or "nltk.tag.TnT".  The value is then stored in the
+        package namespace, so later requests cost nothing.
+
+        The package must be a module object in sys.modules, because
+        Python 2 only calls __getattr__ for missing attributes of
+        instances; the importing itself is done by LazyModule.
+
+        An attribute whose submodule can't be imported raises the
+        ImportError of the submodule.
+
+    """
+    def __init__(self, module, attributes):
+
+        """ Create a LazyPackage with the namespace of module (which is
+            copied), where each name in the dict attributes is read from
+            the submodule of the package that it maps to.
+
+        """
+        types.ModuleType.__init__(self, module.__name__)
+        globals = module.__dict__
+        for submodule in set(attributes.values()):
+            if submodule not in globals:
+                globals[submodule] = LazyModule(submodule, globals)
+        self.__dict__.update(globals)
+        # Keep the module alive: Python clears the namespace of a module
+        # when it is deleted, and its functions still use it.
+        self.__module = module
+        self.__globals = globals
+        self.__attributes = attributes
+
+    def __getattr__(self, name):
+
+        """ Import a lazy attribute on demand.
+        """
+        if name not in self.__attributes:
+            # Names defined after lazy_attributes() was called.
+            try:
+                return self.__globals[name]
+            except KeyError:
+                raise AttributeError(name)
+        submodule = self.__attributes[name]
+        if _debug:
+            print 'LazyPackage: Loading %r from submodule %r' % (name, submodule)
+        # Reading from the LazyModule imports the submodule, and replaces
+        # the LazyModule by the submodule in the package namespace.
+        value = getattr(self.__globals[submodule], name)
+        # Functions of the package look up names in its original namespace.
+        self.__globals[name] = value
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__attributes))
+
+    def __repr__(self):
+        return "<LazyPackage '%s'>" % self.__name__
+
+def lazy_attributes(globals, attributes):
+
+    """ Make the package whose namespace is globals import the given
+        attributes on demand, from the submodules (relative to the
+        package) that they map to.  See LazyPackage.
+
+        This must be called at module level in the package's __init__
+        module (usually at its end), as lazy_attributes(globals(), {...}).
+
+    """
+    name = globals['__name__']
+    package = LazyPackage(sys.modules[name], attributes)
+    sys.modules[name] = package
+    return package
+
+### Import timer
+
+# Maps module names to [cumulative seconds, self seconds].
+_import_times = {}
+
+# The time spent in the nested imports of each running import.
+_nested_times = []
+
+_original_import = None
+
+def start_import_timer():
+
+    """ Start timing imports.  From now on, each import statement that
+        loads new modules adds its time to the module that it imports:
+        its cumulative time includes the time of the modules that it
+        imports in turn, its self time does not.  Imports of lazy
+        attributes are timed too, when they happen.
+
+        Setting the NLTK_IMPORT_TIMER environment variable starts the
+        timer when this module is first imported, and prints the
+        import_report() to stderr when the process exits.
+
+    """
+    global _original_import
+    if _original_import is None:
+        _original_import = __builtin__.__import__
+        __builtin__.__import__ = _timed_import
+
+def stop_import_timer():
+
+    """ Stop timing imports.  The times recorded so far are kept.
+    """
+    global _original_import
+    if _original_import is not None:
+        __builtin__.__import__ = _original_import
+        _original_import = None
+
+def _timed_import(name, globals=None, locals=None, fromlist=None, level=-1):
+    names = _module_names(name, globals)
+    loaded = [n for n in names if sys.modules.get(n) is not None]
+    _nested_times.append(0.0)
+    start = time.time()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.time() - start
+        nested = _nested_times.pop()
+        if _nested_times:
+            _nested_times[-1] += elapsed
+        # Only time the import if it loaded its module; imports of
+        # lazy attributes by "from ... import" are timed on their own.
+        for n in names:
+            if sys.modules.get(n) is not None:
+                if n not in loaded:
+                    times = _import_times.setdefault(n, [0.0, 0.0])
+                    times[0] += elapsed
+                    times[1] += elapsed - nested
+                break
+
+def _module_names(name, globals):
+
+    """ Return the full names that name may refer to when it is
+        imported from the module with the given globals: first the
+        implicit relative name (inside packages), then the absolute
+        name.
+    """
+    names = [name]
+    if globals and globals.get('__name__'):
+        package = globals['__name__']
+        if '__path__' not in globals:
+            package = package.rpartition('.')[0]
+        if package:
+            names.insert(0, name and '%s.%s' % (package, name) or package)
+    return names
+
+def import_times():
+
+    """ Return a list of (module, cumulative seconds, self seconds)
+        tuples for the imports timed so far, by decreasing cumulative
+        time.
+
+    """
+    times = [(name, cumulative, self_time)
+             for (name, (cumulative, self_time)) in _import_times.items()]
+    times.sort(key=lambda (name, cumulative, self_time): -cumulative)
+    return times
+
+def import_report(limit=25, stream=None):
+
+    """ Print the slowest imports timed so far: the limit modules with
+        the highest cumulative import time, with their self time.
+
+    """
+    if stream is None:
+        stream = sys.stdout
+    print >>stream, '%10s %10s  %s' % ('cumulative', 'self', 'module')
+    for name, cumulative, self_time in import_times()[:limit]:
+        print >>stream, '%9.1fms %9.1fms  %s' % (cumulative * 1000,
+                                                self_time * 1000, name)
+
+if os.environ.get('NLTK_IMPORT_TIMER'):
+    start_import_timer()
+    atexit.register(import_report, stream=sys.stderr)
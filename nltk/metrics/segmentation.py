@@ -41,7 +41,10 @@ Statistical Models for Text Segmentation
 Machine Learning, 34, 177-210
 """
 
-import numpy
+from nltk.lazyimport import LazyModule
+
+# numpy is only needed by ghd(), so don't import it until then.
+numpy = LazyModule('numpy', locals(), globals())
 
 def windowdiff(seg1, seg2, k, boundary="1"):
     """
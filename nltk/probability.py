@@ -40,13 +40,20 @@ implementation of the ``ConditionalProbDistI`` interface is
 _NINF = float('-1e300')
 
 
+import array
+import heapq
 import math
 import random
 import warnings
 from operator import itemgetter
-from itertools import imap, islice
+from itertools import islice
 from collections import defaultdict
 
+from nltk.lazyimport import LazyModule
+
+# numpy is only needed by CompactConditionalFreqDist.
+numpy = LazyModule('numpy', locals(), globals())
+
 ##//////////////////////////////////////////////////////
 ##  Frequency Distributions
 ##//////////////////////////////////////////////////////
@@ -81,8 +88,20 @@ class FreqDist(dict):
 
         >>> fdist = FreqDist(word.lower() for word in word_tokenize(sent))
 
+    Counting many samples at once with ``update()`` (or the
+    initializer) is much faster than calling ``inc()`` for each of
+    them.  Frequency distributions whose counts change often between
+    queries can be created with ``indexed=True``; they keep their
+    samples indexed by count, so that ``max()``, ``most_common()``,
+    ``Nr()`` and ``hapaxes()`` don't have to look at every sample
+    after each update.
     """
-    def __init__(self, samples=None):
+    _index = None
+    """The samples indexed by count, or None.  (This is a class
+       attribute, so that distributions pickled before it existed
+       can still be loaded.)"""
+
+    def __init__(self, samples=None, indexed=False):
         """
         Construct a new frequency distribution.  If ``samples`` is
         given, then the frequency distribution will be initialized
@@ -97,9 +116,13 @@ class FreqDist(dict):
         :param samples: The samples to initialize the frequency
             distribution with.
         :type samples: Sequence
+        :param indexed: If true, keep the samples indexed by count.
+        :type indexed: bool
         """
         dict.__init__(self)
         self._N = 0
+        if indexed:
+            self._index = _CountIndex()
         self._reset_caches()
         if samples:
             self.update(samples)
@@ -130,9 +153,11 @@ class FreqDist(dict):
         :rtype: None
         :raise TypeError: If ``sample`` is not a supported sample type.
         """
-
-        self._N += (value - self.get(sample, 0))
+        old = self.get(sample)
+        self._N += (value - (old or 0))
         dict.__setitem__(self, sample, value)
+        if self._index is not None:
+            self._index.move(sample, old, value)
 
         # Invalidate the caches
         self._reset_caches()
@@ -175,6 +200,8 @@ class FreqDist(dict):
 
         :rtype: list
         """
+        if self._index is not None:
+            return sorted(self._index.samples(1))
         return [item for item in self if self[item] == 1]
 
     def Nr(self, r, bins=None):
@@ -197,6 +224,9 @@ class FreqDist(dict):
             if bins is None: return 0
             else: return bins-self.B()
 
+        if self._index is not None:
+            return len(self._index.samples(r))
+
         # We have to search the entire distribution to find Nr.  Since
         # this is an expensive operation, and is likely to be used
         # repeatedly, cache the results.
@@ -268,9 +298,43 @@ class FreqDist(dict):
         if self._max_cache is None:
             if len(self) == 0:
                 raise ValueError('A FreqDist must have at least one sample before max is defined.')
-            self._max_cache = max([(a,b) for (b,a) in self.items()])[1]
+            if self._index is not None:
+                self._max_cache = max(self._index.samples(self._index.max_count))
+            else:
+                self._max_cache = max([(a,b) for (b,a) in self.items()])[1]
         return self._max_cache
 
+    def most_common(self, n=None):
+        """
+        Return the ``n`` most common samples and their counts, in
+        decreasing order of frequency (as given by ``items()``).  If
+        ``n`` is not specified, return all of them.
+
+        Unlike ``items()``, this does not sort all the samples.
+
+        :param n: The number of samples to return.
+        :type n: int
+        :rtype: list(tuple)
+        """
+        if n is None:
+            return self.items()
+        if self._item_cache:
+            return self._item_cache[:n]
+        if self._index is None:
+            return heapq.nsmallest(n, dict.iteritems(self),
+                                   key=lambda x:(-x[1], x[0]))
+
+        # Take whole buckets of samples with equal counts, highest
+        # counts first, until there are enough.
+        items = []
+        for count in sorted(self._index.counts(), reverse=True):
+            if len(items) >= n:
+                break
+            bucket = heapq.nsmallest(n - len(items),
+                                     self._index.samples(count))
+            items.extend((sample, count) for sample in bucket)
+        return items
+
     def plot(self, *args, **kwargs):
         """
         Plot samples from the frequency distribution
@@ -417,6 +481,8 @@ class FreqDist(dict):
 
         :rtype: FreqDist
         """
+        if self._index is not None:
+            return self.__class__(self, indexed=True)
         return self.__class__(self)
 
     def update(self, samples):
@@ -424,28 +490,59 @@ class FreqDist(dict):
         Update the frequency distribution with the provided list of samples.
         This is a faster way to add multiple samples to the distribution.
 
-        :param samples: The samples to add.
+        :param samples: The samples to add, or a dictionary (such as a
+            ``FreqDist``) that maps samples to the amounts to add to
+            their counts.
         :type samples: list
         """
-        try:
-            sample_iter = samples.iteritems()
-        except:
-            sample_iter = imap(lambda x: (x,1), samples)
-        for sample, count in sample_iter:
-            self.inc(sample, count=count)
+        if isinstance(samples, dict):
+            counts = dict.iteritems(samples)
+        elif hasattr(samples, 'iteritems'):
+            counts = samples.iteritems()
+        else:
+            # Count the samples in a plain dict first, so that each
+            # distinct sample is only added (and the caches are only
+            # invalidated) once.
+            counts = {}
+            get = counts.get
+            for sample in samples:
+                counts[sample] = get(sample, 0) + 1
+            counts = counts.iteritems()
+
+        get = self.get
+        setitem = dict.__setitem__
+        index = self._index
+        total = 0
+        for sample, count in counts:
+            if count == 0: continue
+            old = get(sample)
+            setitem(self, sample, (old or 0) + count)
+            if index is not None:
+                index.move(sample, old, (old or 0) + count)
+            total += count
+        self._N += total
+        self._reset_caches()
 
     def pop(self, other):
-        self._N -= 1
+        value = dict.pop(self, other)
+        self._N -= value
+        if self._index is not None:
+            self._index.move(other, value, None)
         self._reset_caches()
-        return dict.pop(self, other)
+        return value
 
     def popitem(self):
-        self._N -= 1
+        sample, value = dict.popitem(self)
+        self._N -= value
+        if self._index is not None:
+            self._index.move(sample, value, None)
         self._reset_caches()
-        return dict.popitem(self)
+        return sample, value
 
     def clear(self):
         self._N = 0
+        if self._index is not None:
+            self._index = _CountIndex()
         self._reset_caches()
         dict.clear(self)
 
@@ -494,6 +591,54 @@ class FreqDist(dict):
     def __getitem__(self, sample):
         return self.get(sample, 0)
 
+class _CountIndex(object):
+    """
+    The samples of a ``FreqDist``, indexed by count.  The index is
+    updated whenever a count changes, so queries by count don't need
+    to look at every sample.
+    """
+    def __init__(self):
+        self._buckets = {}
+        """A dictionary mapping each count to the set of samples with
+           that count."""
+        self.max_count = None
+        """The highest count, or None if there are no samples."""
+
+    def move(self, sample, old, new):
+        """
+        Record that the count of ``sample`` changed from ``old`` to
+        ``new``, where None means that the sample is not in the
+        distribution.
+        """
+        if old == new:
+            return
+        if new is not None:
+            self._buckets.setdefault(new, set()).add(sample)
+            if self.max_count is None or new > self.max_count:
+                self.max_count = new
+        if old is not None:
+            bucket = self._buckets[old]
+            bucket.discard(sample)
+            if not bucket:
+                del self._buckets[old]
+                if old == self.max_count:
+                    self.max_count = max(self._buckets) if self._buckets else None
+
+    def samples(self, count):
+        """
+        :return: The set of samples with the given count.  Don't
+            modify it.
+        :rtype: set
+        """
+        return self._buckets.get(count, ())
+
+    def counts(self):
+        """
+        :return: The counts that some sample has.
+        :rtype: list(int)
+        """
+        return self._buckets.keys()
+
 ##//////////////////////////////////////////////////////
 ##  Probability Distributions
 ##//////////////////////////////////////////////////////
@@ -1854,6 +1999,293 @@ class ConditionalFreqDist(defaultdict):
         """
         return '<ConditionalFreqDist with %d conditions>' % len(self)
 
+class CompactConditionalFreqDist(object):
+    """
+    A conditional frequency distribution that stores its counts
+    compactly, for counting very many ``(condition, sample)`` pairs,
+    such as the bigrams of a large corpus.  Conditions and samples are
+    interned in a shared vocabulary, which gives each of them an
+    integer id, and the counts are kept in a sorted array of
+    ``(condition id, sample id)`` keys and an array of counts.  Each
+    distinct pair takes 16 bytes, instead of the hundreds of bytes of
+    an entry in a ``ConditionalFreqDist``.  (This class requires
+    numpy.)
+
+        >>> from nltk.probability import CompactConditionalFreqDist
+        >>> words = 'the cat saw the dog and the dog saw the cat'.split()
+        >>> cfdist = CompactConditionalFreqDist(zip(words, words[1:]))
+        >>> cfdist.conditions()
+        ['and', 'cat', 'dog', 'saw', 'the']
+        >>> cfdist['the']['dog'], cfdist['the'].N(), cfdist.N()
+        (2, 4, 10)
+
+    The query API is that of ``ConditionalFreqDist``: indexing gives
+    the counts for one condition, which can be queried and
+    incremented like a ``FreqDist``.  Use ``to_conditional_freqdist()``
+    and ``from_conditional_freqdist()`` to convert between the two
+    classes.
+
+    New counts are buffered, and merged into the arrays when the
+    buffer grows as large as the arrays, or when the counts are
+    queried.  So counting is fastest when it is not interleaved with
+    queries.
+    """
+    def __init__(self, cond_samples=None):
+        """
+        Construct a new empty compact conditional frequency
+        distribution.
+
+        :param cond_samples: The samples to initialize the conditional
+            frequency distribution with
+        :type cond_samples: Sequence of (condition, sample) tuples
+        """
+        self._ids = {}
+        """A dictionary mapping each condition and sample to its id."""
+        self._vocabulary = []
+        """The condition or sample of each id."""
+        self._keys = numpy.zeros(0, 'i8')
+        """The sorted keys ``(condition id << 32) | sample id``."""
+        self._counts = numpy.zeros(0, 'i8')
+        """The count of each key."""
+        self._N = 0
+        self._reset_buffer()
+        if cond_samples:
+            self.update(cond_samples)
+
+    def _reset_buffer(self):
+        self._buffered_conds = array.array('i')
+        self._buffered_samples = array.array('i')
+        self._buffered_counts = array.array('i')
+        self._buffer_limit = max(len(self._keys), 65536)
+
+    def _intern(self, value):
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self._vocabulary)
+            self._vocabulary.append(value)
+        return value_id
+
+    def inc(self, condition, sample, count=1):
+        """
+        Increment the count of ``sample`` under ``condition``.
+
+        :param count: The amount to increment the sample's count by.
+        :type count: int
+        """
+        if count == 0: return
+        self._buffered_conds.append(self._intern(condition))
+        self._buffered_samples.append(self._intern(sample))
+        self._buffered_counts.append(count)
+        self._N += count
+        if len(self._buffered_counts) >= self._buffer_limit:
+            self._flush()
+
+    def update(self, cond_samples):
+        """
+        Increment the count of each ``(condition, sample)`` pair in
+        ``cond_samples`` by one.
+
+        :type cond_samples: Sequence of (condition, sample) tuples
+        """
+        intern = self._intern
+        conds = self._buffered_conds
+        samples = self._buffered_samples
+        counts = self._buffered_counts
+        for (cond, sample) in cond_samples:
+            conds.append(intern(cond))
+            samples.append(intern(sample))
+            counts.append(1)
+            self._N += 1
+            if len(counts) >= self._buffer_limit:
+                self._flush()
+                conds = self._buffered_conds
+                samples = self._buffered_samples
+                counts = self._buffered_counts
+
+    def _flush(self):
+        """
+        Merge the buffered counts into the arrays.
+        """
+        if not len(self._buffered_counts):
+            return
+        conds = numpy.frombuffer(self._buffered_conds, numpy.intc)
+        samples = numpy.frombuffer(self._buffered_samples, numpy.intc)
+        keys = (conds.astype('i8') << 32) | samples
+        counts = numpy.frombuffer(self._buffered_counts, numpy.intc)
+
+        # Sum the counts of equal buffered keys.
+        order = numpy.argsort(keys)
+        keys = keys[order]
+        starts = numpy.flatnonzero(numpy.concatenate(
+            ([True], keys[1:] != keys[:-1])))
+        counts = numpy.add.reduceat(counts[order], starts).astype('i8')
+        keys = keys[starts]
+
+        # Add them to the counts of known keys, and insert new keys.
+        positions = numpy.searchsorted(self._keys, keys)
+        known = positions < len(self._keys)
+        known[known] = self._keys[positions[known]] == keys[known]
+        self._counts[positions[known]] += counts[known]
+        # Check for emptied counts before the insertion shifts them.
+        emptied = not counts.all() or not self._counts[positions[known]].all()
+        new = ~known
+        self._keys = numpy.insert(self._keys, positions[new], keys[new])
+        self._counts = numpy.insert(self._counts, positions[new], counts[new])
+
+        if emptied:
+            nonzero = self._counts != 0
+            self._keys = self._keys[nonzero]
+            self._counts = self._counts[nonzero]
+        self._reset_buffer()
+
+    def _range(self, condition):
+        """
+        :return: The slice of the arrays that holds the counts of
+            ``condition``.
+        """
+        self._flush()
+        cond_id = self._ids.get(condition)
+        if cond_id is None:
+            return 0, 0
+        lo, hi = numpy.searchsorted(self._keys, [cond_id << 32,
+                                                 (cond_id+1) << 32])
+        return int(lo), int(hi)
+
+    def _count(self, condition, sample):
+        lo, hi = self._range(condition)
+        sample_id = self._ids.get(sample)
+        if sample_id is None or lo == hi:
+            return 0
+        key = (self._ids[condition] << 32) | sample_id
+        i = lo + int(numpy.searchsorted(self._keys[lo:hi], key))
+        if i < hi and self._keys[i] == key:
+            return int(self._counts[i])
+        return 0
+
+    def conditions(self):
+        """
+        Return a sorted list of the conditions that have samples.
+
+        :rtype: list
+        """
+        self._flush()
+        cond_ids = numpy.unique(self._keys >> 32)
+        return sorted(self._vocabulary[i] for i in cond_ids.tolist())
+
+    def N(self):
+        """
+        Return the total number of sample outcomes that have been
+        recorded by this ``CompactConditionalFreqDist``.
+
+        :rtype: int
+        """
+        return self._N
+
+    def __getitem__(self, condition):
+        return _CompactCondition(self, condition)
+
+    def __contains__(self, condition):
+        lo, hi = self._range(condition)
+        return lo < hi
+
+    def __len__(self):
+        self._flush()
+        return len(numpy.unique(self._keys >> 32))
+
+    def __iter__(self):
+        return iter(self.conditions())
+
+    def _freqdist(self, condition):
+        lo, hi = self._range(condition)
+        sample_ids = (self._keys[lo:hi] & 0xffffffff).tolist()
+        vocabulary = self._vocabulary
+        return FreqDist(dict(zip([vocabulary[i] for i in sample_ids],
+                                 self._counts[lo:hi].tolist())))
+
+    def to_conditional_freqdist(self):
+        """
+        :return: A ``ConditionalFreqDist`` with the same counts.
+        :rtype: ConditionalFreqDist
+        """
+        cfdist = ConditionalFreqDist()
+        for condition in self.conditions():
+            cfdist[condition] = self._freqdist(condition)
+        return cfdist
+
+    @classmethod
+    def from_conditional_freqdist(cls, cfdist):
+        """
+        :return: A ``CompactConditionalFreqDist`` with the same counts
+            as the ``ConditionalFreqDist`` ``cfdist``.
+        :rtype: CompactConditionalFreqDist
+        """
+        compact = cls()
+        for condition in cfdist.conditions():
+            for sample, count in dict.iteritems(cfdist[condition]):
+                compact.inc(condition, sample, count)
+        return compact
+
+    def __repr__(self):
+        """
+        Return a string representation of this ``CompactConditionalFreqDist``.
+
+        :rtype: str
+        """
+        return '<CompactConditionalFreqDist with %d conditions>' % len(self)
+
+class _CompactCondition(object):
+    """
+    The counts of one condition of a ``CompactConditionalFreqDist``,
+    with the query API of a ``FreqDist``.  Queries that list samples
+    (such as ``items()`` and ``max()``) are answered by a ``FreqDist``
+    copy of the counts, which is also returned by ``freqdist()``.
+    """
+    def __init__(self, cfdist, condition):
+        self._cfdist = cfdist
+        self._condition = condition
+
+    def __getitem__(self, sample):
+        return self._cfdist._count(self._condition, sample)
+
+    def __contains__(self, sample):
+        return self[sample] != 0
+
+    def inc(self, sample, count=1):
+        self._cfdist.inc(self._condition, sample, count)
+
+    def N(self):
+        lo, hi = self._cfdist._range(self._condition)
+        return int(self._cfdist._counts[lo:hi].sum())
+
+    def B(self):
+        lo, hi = self._cfdist._range(self._condition)
+        return hi - lo
+
+    __len__ = B
+
+    def freq(self, sample):
+        N = self.N()
+        if N == 0:
+            return 0
+        return float(self[sample]) / N
+
+    def freqdist(self):
+        """
+        :return: A ``FreqDist`` copy of the counts of this condition.
+        :rtype: FreqDist
+        """
+        return self._cfdist._freqdist(self._condition)
+
+    def samples(self): return self.freqdist().samples()
+    def keys(self): return self.freqdist().keys()
+    def values(self): return self.freqdist().values()
+    def items(self): return self.freqdist().items()
+    def max(self): return self.freqdist().max()
+    def __iter__(self): return iter(self.keys())
+
+    def __repr__(self):
+        return '<FreqDist with %d samples and %d outcomes>' % (self.B(), self.N())
+
 
 class ConditionalProbDistI(defaultdict):
     """
@@ -2239,7 +2671,7 @@ if __name__ == '__main__':
     demo(5, 5000)
     gt_demo()
 
-__all__ = ['ConditionalFreqDist', 'ConditionalProbDist',
+__all__ = ['ConditionalFreqDist', 'CompactConditionalFreqDist', 'ConditionalProbDist',
            'ConditionalProbDistI', 'CrossValidationProbDist',
            'DictionaryConditionalProbDist', 'DictionaryProbDist', 'ELEProbDist',
            'FreqDist', 'GoodTuringProbDist', 'SimpleGoodTuringProbDist', 'HeldoutProbDist',
@@ -62,20 +62,11 @@ from nltk.tag.sequential import (SequentialBackoffTagger, ContextTagger,
                                  BigramTagger, TrigramTagger, AffixTagger,
                                  RegexpTagger, ClassifierBasedTagger,
                                  ClassifierBasedPOSTagger)
-from nltk.tag.brill      import BrillTagger, BrillTaggerTrainer, FastBrillTaggerTrainer
-from nltk.tag.tnt        import TnT
 #from nltk.tag.hunpos     import HunposTagger
 #from nltk.tag.stanford   import StanfordTagger
-from nltk.tag.crf        import MalletCRF
 
-from nltk.data      import load
-
-# Import hmm module if numpy is installed
-try:
-    import numpy
-    from nltk.tag.hmm import HiddenMarkovModelTagger, HiddenMarkovModelTrainer
-except ImportError:
-    pass
+from nltk.data      import load, pin
+from nltk.lazyimport import lazy_attributes
 
 # Standard treebank POS tagger
 _POS_TAGGER = 'taggers/maxent_treebank_pos_tagger/english.pickle'
@@ -107,6 +98,29 @@ def batch_pos_tag(sentences):
     tagger = load(_POS_TAGGER)
     return tagger.batch_tag(sentences)
 
+def pin_pos_tagger():
+    """
+    Load NLTK's currently recommended part of speech tagger, and pin it
+    in the resource cache, so that ``pos_tag()`` and ``batch_pos_tag()``
+    never have to load it again for the life of the process.  Long-running
+    servers should call this once, when they start.
+
+    :return: The part of speech tagger
+    :rtype: TaggerI
+    """
+    return pin(_POS_TAGGER)
+
+# The backend taggers are imported on first use (the HMM tagger requires
+# numpy); see nltk.lazyimport.LazyPackage.
+lazy_attributes(globals(), {
+    'BrillTagger':              'brill',
+    'BrillTaggerTrainer':       'brill',
+    'FastBrillTaggerTrainer':   'brill',
+    'TnT':                      'tnt',
+    'MalletCRF':                'crf',
+    'HiddenMarkovModelTagger':  'hmm',
+    'HiddenMarkovModelTrainer': 'hmm',
+    })
 
 if __name__ == "__main__":
     import doctest
@@ -563,6 +563,59 @@ class ClassifierBasedTagger(SequentialBackoffTagger, FeaturesetTaggerI):
             else:
                 return None
 
+    def batch_tag(self, sentences):
+        """
+        Tag a list of sentences, classifying the tokens of all the
+        sentences together.  The sentences are tagged left to right in
+        lock step: the tokens at each index are classified with one
+        call to the classifier's ``batch_classify()`` (or
+        ``batch_prob_classify()``, if there is a cutoff probability),
+        since their histories are all known by then.  The result is
+        the same as tagging each sentence with ``tag()``.
+
+        :type sentences: list(list(str))
+        :rtype: list(list(tuple(str, str)))
+        """
+        # A subclass that chooses tags differently must be asked token
+        # by token.
+        if self.choose_tag.im_func is not ClassifierBasedTagger.choose_tag.im_func:
+            return SequentialBackoffTagger.batch_tag(self, sentences)
+
+        sentences = list(sentences)
+        histories = [[] for sentence in sentences]
+        active = range(len(sentences))
+        index = 0
+        while True:
+            active = [i for i in active if index < len(sentences[i])]
+            if not active:
+                break
+
+            featuresets = [self.feature_detector(sentences[i], index,
+                                                 histories[i])
+                           for i in active]
+            if self._cutoff_prob is None:
+                tags = self._classifier.batch_classify(featuresets)
+            else:
+                tags = []
+                for pdist in self._classifier.batch_prob_classify(featuresets):
+                    tag = pdist.max()
+                    if pdist.prob(tag) < self._cutoff_prob:
+                        tag = None
+                    tags.append(tag)
+
+            for (i, tag) in zip(active, tags):
+                # Consult the backoff taggers, as tag_one() would.
+                if tag is None:
+                    for tagger in self._taggers[1:]:
+                        tag = tagger.choose_tag(sentences[i], index,
+                                                histories[i])
+                        if tag is not None: break
+                histories[i].append(tag)
+            index += 1
+
+        return [zip(sentence, history)
+                for (sentence, history) in zip(sentences, histories)]
+
     def _train(self, tagged_corpus, classifier_builder, verbose):
         """
         Build a new classifier, based on the given training data
@@ -610,58 +663,138 @@ class ClassifierBasedTagger(SequentialBackoffTagger, FeaturesetTaggerI):
         """
         return self._classifier
 
+_NUMBER_RE = re.compile(r'[0-9]+(\.[0-9]*)?|[0-9]*\.[0-9]+$')
+_PUNCT_RE = re.compile(r'\W+$')
+_UPCASE_RE = re.compile(r'[A-Z][a-z]+$')
+_DOWNCASE_RE = re.compile(r'[a-z]+$')
+_MIXEDCASE_RE = re.compile(r'\w+$')
+
+def _lexical_features(word):
+    """
+    :return: The lexical features of a word that
+        ``ClassifierBasedPOSTagger`` uses: its shape, its lowercase
+        form, and its last three, two and one lowercase characters.
+    :rtype: tuple(str)
+    """
+    if _NUMBER_RE.match(word):
+        shape = 'number'
+    elif _PUNCT_RE.match(word):
+        shape = 'punct'
+    elif _UPCASE_RE.match(word):
+        shape = 'upcase'
+    elif _DOWNCASE_RE.match(word):
+        shape = 'downcase'
+    elif _MIXEDCASE_RE.match(word):
+        shape = 'mixedcase'
+    else:
+        shape = 'other'
+    lower = word.lower()
+    return (shape, lower, lower[-3:], lower[-2:], lower[-1:])
+
 class ClassifierBasedPOSTagger(ClassifierBasedTagger):
     """
     A classifier based part of speech tagger.
+
+    The lexical features of each word (its shape, lowercase form and
+    suffixes) do not depend on its context, so they are cached for up
+    to ``lexical_cache_size`` words.  The cache is kept in two
+    generations: when the newer one is full, the older one is dropped,
+    so the words that have not been seen for longest are forgotten
+    first, and a lookup costs a single dict access.  The number of
+    lookups that were answered from the cache is counted in
+    ``lexical_cache_hits``, and the rest in ``lexical_cache_misses``.
     """
+    lexical_cache_size = 20000
+    """The maximum number of words whose lexical features are cached."""
+
+    lexical_cache_hits = 0
+    """The number of words whose lexical features were cached."""
+
+    lexical_cache_misses = 0
+    """The number of words whose lexical features were computed."""
+
+    def lexical_features(self, word):
+        """
+        :return: The lexical features of *word*: its shape, its
+            lowercase form, and its last three, two and one lowercase
+            characters.  These are looked up in the lexical cache.
+        :rtype: tuple(str)
+        """
+        try:
+            features = self._lexical_cache[word]
+        except KeyError:
+            features = self._lexical_cache_old.get(word)
+            if features is None:
+                features = _lexical_features(word)
+                self.lexical_cache_misses += 1
+            else:
+                self.lexical_cache_hits += 1
+            if len(self._lexical_cache) >= self.lexical_cache_size // 2:
+                self._lexical_cache_old = self._lexical_cache
+                self._lexical_cache = {}
+            self._lexical_cache[word] = features
+            return features
+        except AttributeError:
+            # Taggers unpickled without a cache start with an empty one.
+            self.clear_lexical_cache()
+            return self.lexical_features(word)
+        self.lexical_cache_hits += 1
+        return features
+
+    def clear_lexical_cache(self):
+        """
+        Forget the cached lexical features of all words, and reset the
+        hit and miss counters.
+        """
+        self._lexical_cache = {}
+        self._lexical_cache_old = {}
+        self.lexical_cache_hits = 0
+        self.lexical_cache_misses = 0
+
+    def __getstate__(self):
+        # The lexical cache is rebuilt as words are seen, so don't
+        # pickle it.
+        state = self.__dict__.copy()
+        for attr in ('_lexical_cache', '_lexical_cache_old',
+                     'lexical_cache_hits', 'lexical_cache_misses'):
+            state.pop(attr, None)
+        return state
+
     def feature_detector(self, tokens, index, history):
         word = tokens[index]
+        shape, lower, suffix3, suffix2, suffix1 = self.lexical_features(word)
         if index == 0:
             prevword = prevprevword = None
             prevtag = prevprevtag = None
         elif index == 1:
-            prevword = tokens[index-1].lower()
+            prevword = self.lexical_features(tokens[index-1])[1]
             prevprevword = None
             prevtag = history[index-1]
             prevprevtag = None
         else:
-            prevword = tokens[index-1].lower()
-            prevprevword = tokens[index-2].lower()
+            prevword = self.lexical_features(tokens[index-1])[1]
+            prevprevword = self.lexical_features(tokens[index-2])[1]
             prevtag = history[index-1]
             prevprevtag = history[index-2]
 
-        if re.match('[0-9]+(\.[0-9]*)?|[0-9]*\.[0-9]+$', word):
-            shape = 'number'
-        elif re.match('\W+$', word):
-            shape = 'punct'
-        elif re.match('[A-Z][a-z]+$', word):
-            shape = 'upcase'
-        elif re.match('[a-z]+$', word):
-            shape = 'downcase'
-        elif re.match('\w+$', word):
-            shape = 'mixedcase'
-        else:
-            shape = 'other'
-
         features = {
             'prevtag': prevtag,
             'prevprevtag': prevprevtag,
             'word': word,
-            'word.lower': word.lower(),
-            'suffix3': word.lower()[-3:],
-            'suffix2': word.lower()[-2:],
-            'suffix1': word.lower()[-1:],
+            'word.lower': lower,
+            'suffix3': suffix3,
+            'suffix2': suffix2,
+            'suffix1': suffix1,
             'prevprevword': prevprevword,
             'prevword': prevword,
-            'prevtag+word': '%s+%s' % (prevtag, word.lower()),
-            'prevprevtag+word': '%s+%s' % (prevprevtag, word.lower()),
-            'prevword+word': '%s+%s' % (prevword, word.lower()),
+            'prevtag+word': '%s+%s' % (prevtag, lower),
+            'prevprevtag+word': '%s+%s' % (prevprevtag, lower),
+            'prevword+word': '%s+%s' % (prevword, lower),
             'shape': shape,
             }
         return features
 
 
-
 if __name__ == "__main__":
     import doctest
     doctest.testmod(optionflags=doctest.NORMALIZE_WHITESPACE)
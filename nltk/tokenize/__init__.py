@@ -56,14 +56,8 @@ from nltk.tokenize.regexp   import (RegexpTokenizer, WhitespaceTokenizer,
                                     blankline_tokenize)
 from nltk.tokenize.punkt    import PunktSentenceTokenizer, PunktWordTokenizer
 from nltk.tokenize.sexpr    import SExprTokenizer, sexpr_tokenize
-from nltk.tokenize.treebank import TreebankWordTokenizer
-
-try:
-    import numpy
-except ImportError:
-    pass
-else:
-    from nltk.tokenize.texttiling import TextTilingTokenizer
+from nltk.tokenize.treebank import TreebankWordTokenizer, FastTreebankWordTokenizer
+from nltk.lazyimport        import lazy_attributes
 
 # Standard sentence tokenizer.
 def sent_tokenize(text):
@@ -86,6 +80,11 @@ def word_tokenize(text):
     """
     return _word_tokenize(text)
 
+# The TextTiling tokenizer requires numpy, so it is imported on first use;
+# see nltk.lazyimport.LazyPackage.
+lazy_attributes(globals(), {
+    'TextTilingTokenizer': 'texttiling',
+    })
 
 if __name__ == "__main__":
     import doctest
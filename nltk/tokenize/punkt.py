@@ -64,7 +64,9 @@ parameters from the given text.
 :class:`.PunktTrainer` learns parameters such as a list of abbreviations
 (without supervision) from portions of text. Using a ``PunktTrainer`` directly
 allows for incremental training and modification of the hyper-parameters used
-to decide what is considered an abbreviation, etc.
+to decide what is considered an abbreviation, etc.  Its ``train_parallel()``
+method collects training data from many texts in worker processes, and
+``save_checkpoint()`` saves the training data so that training can be resumed.
 
 :class:`.PunktWordTokenizer` uses a regular expression to divide a text into tokens,
 leaving all periods attached to words, but separating off other punctuation:
@@ -87,8 +89,14 @@ The algorithm for this tokenizer is described in::
 
 import re
 import math
+import copy
 from collections import defaultdict
 
+try:
+    import cPickle as pickle
+except:
+    import pickle
+
 from nltk.probability import FreqDist
 from nltk.tokenize.api import TokenizerI
 
@@ -605,8 +613,10 @@ class PunktTrainer(PunktBaseClass):
     def __init__(self, train_text=None, verbose=False,
             lang_vars=PunktLanguageVars(), token_cls=PunktToken):
 
+        # Each trainer learns its own parameters (the default argument of
+        # PunktBaseClass.__init__ is shared by every instance).
         PunktBaseClass.__init__(self, lang_vars=lang_vars,
-                token_cls=token_cls)
+                token_cls=token_cls, params=PunktParameters())
 
         self._type_fdist = FreqDist()
         """A frequency distribution giving the frequency of each
@@ -732,20 +742,7 @@ class PunktTrainer(PunktBaseClass):
                 self._num_period_toks += 1
 
         # Look for new abbreviations, and for types that no longer are
-        unique_types = self._unique_types(tokens)
-        for abbr, score, is_add in self._reclassify_abbrev_types(unique_types):
-            if score >= self.ABBREV:
-                if is_add:
-                    self._params.abbrev_types.add(abbr)
-                    if verbose:
-                        print ('  Abbreviation: [%6.4f] %s' %
-                               (score, abbr))
-            else:
-                if not is_add:
-                    self._params.abbrev_types.remove(abbr)
-                    if verbose:
-                        print ('  Removed abbreviation: [%6.4f] %s' %
-                               (score, abbr))
+        self._update_abbrev_types(self._unique_types(tokens), verbose)
 
         # Make a preliminary pass through the document, marking likely
         # sentence breaks, abbreviations, and ellipsis tokens.
@@ -782,6 +779,25 @@ class PunktTrainer(PunktBaseClass):
     def _unique_types(self, tokens):
         return set(aug_tok.type for aug_tok in tokens)
 
+    def _update_abbrev_types(self, types, verbose):
+        """
+        Adds the given types that are now likely abbreviations to the
+        known abbreviations, and removes those that no longer are.
+        """
+        for abbr, score, is_add in self._reclassify_abbrev_types(types):
+            if score >= self.ABBREV:
+                if is_add:
+                    self._params.abbrev_types.add(abbr)
+                    if verbose:
+                        print ('  Abbreviation: [%6.4f] %s' %
+                               (score, abbr))
+            else:
+                if not is_add:
+                    self._params.abbrev_types.remove(abbr)
+                    if verbose:
+                        print ('  Removed abbreviation: [%6.4f] %s' %
+                               (score, abbr))
+
     def finalize_training(self, verbose=False):
         """
         Uses data that has been gathered in training to determine likely
@@ -802,6 +818,247 @@ class PunktTrainer(PunktBaseClass):
 
         self._finalized = True
 
+    #////////////////////////////////////////////////////////////
+    #{ Parallel training
+    #////////////////////////////////////////////////////////////
+
+    def train_parallel(self, texts, processes=None, verbose=False,
+            finalize=True):
+        """
+        Collects training data from a list of texts, in a pool of
+        worker processes.  The training data collected is the same as
+        that collected by ``train()`` from the texts joined by blank
+        lines.
+
+        Training is done in two parallel passes over the texts.  The
+        first counts the types in each text; the counts are merged, and
+        abbreviations are found from the merged counts.  The second
+        annotates each text with these abbreviations, and collects the
+        orthographic contexts, sentence starters and collocations, which
+        are merged in turn.  Only the tokens at the boundaries between
+        texts are annotated in this process.
+
+        :param texts: The training texts.
+        :type texts: list(str)
+        :param processes: The number of worker processes, or None for
+            one per CPU.  With one process, or where ``multiprocessing``
+            is not available, this is the same as calling ``train()``.
+        :type processes: int
+        """
+        texts = list(texts)
+        try:
+            import multiprocessing
+        except ImportError:
+            processes = 1
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if processes <= 1 or len(texts) <= 1:
+            self.train('\n\n'.join(texts), verbose, finalize)
+            return
+
+        self._finalized = False
+
+        # Count the types, and find new abbreviations.
+        unique_types = set()
+        for type_fdist, num_period_toks in self._map_shards(
+                _count_shard_types, texts, processes):
+            self._type_fdist.update(type_fdist)
+            self._num_period_toks += num_period_toks
+            unique_types.update(type_fdist)
+        self._update_abbrev_types(unique_types, verbose)
+
+        # Collect the statistics of the annotated texts.
+        shards = self._map_shards(_collect_shard_statistics, texts,
+                                  processes)
+        for shard in filter(None, shards):
+            for typ, flag in shard.ortho_context.iteritems():
+                self._params.add_ortho_context(typ, flag)
+            self._sentbreak_count += shard.sentbreak_count
+            self._sent_starter_fdist.update(shard.sent_starter_fdist)
+            self._collocation_fdist.update(shard.collocation_fdist)
+
+        # Annotate the first token of each text, which follows the last
+        # token of the text before it.
+        context = 'internal'
+        rare_abbrev_candidates = []
+        prev_tok = None
+        for index, shard in enumerate(shards):
+            if shard is None:
+                continue
+            aug_tok = self._Token(shard.first_tok, linestart=True,
+                                  parastart=index > 0 or shard.parastart)
+            self._first_pass_annotation(aug_tok)
+            self._get_orthography_data([aug_tok], context)
+            context = shard.context
+            if prev_tok is not None:
+                boundary = _PunktShardStatistics()
+                self._shard_pair_statistics(prev_tok, aug_tok, boundary)
+                self._sent_starter_fdist.update(boundary.sent_starter_fdist)
+                self._collocation_fdist.update(boundary.collocation_fdist)
+                rare_abbrev_candidates.extend(boundary.rare_abbrev_candidates)
+            prev_tok = self._Token(shard.last_tok)
+            self._first_pass_annotation(prev_tok)
+
+        # Look for rare abbreviations, now that all the orthographic
+        # contexts are known.
+        for shard in filter(None, shards):
+            rare_abbrev_candidates.extend(shard.rare_abbrev_candidates)
+        for tok1, tok2 in rare_abbrev_candidates:
+            aug_tok1, aug_tok2 = self._Token(tok1), self._Token(tok2)
+            self._first_pass_annotation(aug_tok1)
+            self._first_pass_annotation(aug_tok2)
+            if self._is_rare_abbrev_type(aug_tok1, aug_tok2):
+                self._params.abbrev_types.add(aug_tok1.type_no_period)
+                if verbose:
+                    print ('  Rare Abbrev: %s' % aug_tok1.type)
+
+        if finalize:
+            self.finalize_training(verbose)
+
+    def _map_shards(self, function, texts, processes):
+        """
+        Applies a shard function to each text, in a pool of worker
+        processes that each have a copy of this trainer, and returns
+        the results in order.
+        """
+        trainer = copy.copy(self)
+        trainer._type_fdist = FreqDist()
+        trainer._collocation_fdist = FreqDist()
+        trainer._sent_starter_fdist = FreqDist()
+        trainer._params = PunktParameters()
+        trainer._params.abbrev_types = self._params.abbrev_types
+
+        import multiprocessing
+        pool = multiprocessing.Pool(processes, _init_shard_worker, (trainer,))
+        try:
+            chunksize = max(1, len(texts) // (4 * processes))
+            results = pool.map(_ShardWorkerFunction(function), texts,
+                               chunksize)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return results
+
+    def _shard_statistics(self, text):
+        """
+        Annotates a training text with the known abbreviations, and
+        returns its statistics.  This trainer's orthographic context is
+        cleared, and used for the text's orthographic context.
+
+        :rtype: _PunktShardStatistics
+        """
+        tokens = list(self._annotate_first_pass(self._tokenize_words(text)))
+        if not tokens:
+            return None
+        self._params.clear_ortho_context()
+
+        shard = _PunktShardStatistics()
+        shard.first_tok = tokens[0].tok
+        shard.parastart = bool(tokens[0].parastart)
+        shard.last_tok = tokens[-1].tok
+
+        # The context of the first token depends on the texts before.
+        shard.context = self._get_orthography_data(tokens[1:],
+            self._next_ortho_context(tokens[0]))
+        shard.ortho_context = dict(self._params.ortho_context)
+        shard.sentbreak_count = self._get_sentbreak_count(tokens)
+
+        for aug_tok1, aug_tok2 in _pair_iter(tokens):
+            self._shard_pair_statistics(aug_tok1, aug_tok2, shard)
+
+        return shard
+
+    def _shard_pair_statistics(self, aug_tok1, aug_tok2, shard):
+        """
+        Collects the statistics of a pair of contiguous annotated tokens
+        in a training text, like the loop over pairs in
+        ``_train_tokens()``.  Pairs that may show a rare abbreviation
+        are recorded, to be checked once the orthographic contexts of
+        all the texts are known.
+        """
+        if not aug_tok1.period_final or not aug_tok2:
+            return
+
+        if (aug_tok1.sentbreak and not aug_tok1.abbr and
+            (aug_tok2.tok[:1] in self._lang_vars.internal_punctuation or
+             aug_tok2.first_lower)):
+            shard.rare_abbrev_candidates.append((aug_tok1.tok, aug_tok2.tok))
+
+        if self._is_potential_sent_starter(aug_tok2, aug_tok1):
+            fdist = shard.sent_starter_fdist
+            fdist[aug_tok2.type] = fdist.get(aug_tok2.type, 0) + 1
+
+        if self._is_potential_collocation(aug_tok1, aug_tok2):
+            fdist = shard.collocation_fdist
+            bigram = (aug_tok1.type_no_period, aug_tok2.type_no_sentperiod)
+            fdist[bigram] = fdist.get(bigram, 0) + 1
+
+    #////////////////////////////////////////////////////////////
+    #{ Checkpoints
+    #////////////////////////////////////////////////////////////
+
+    CHECKPOINT_VERSION = 1
+    """The version of the checkpoint format written by
+    ``save_checkpoint()``."""
+
+    def save_checkpoint(self, filename):
+        """
+        Saves the training data collected so far, so that training can
+        be resumed later with ``load_checkpoint()``.  A checkpoint is a
+        pickled dict of built-in types, so it does not depend on the
+        trainer classes.
+
+        :param filename: The name of the checkpoint file.
+        :type filename: str
+        """
+        checkpoint = {
+            'version': self.CHECKPOINT_VERSION,
+            'type_fdist': dict(self._type_fdist),
+            'num_period_toks': self._num_period_toks,
+            'collocation_fdist': dict(self._collocation_fdist),
+            'sent_starter_fdist': dict(self._sent_starter_fdist),
+            'sentbreak_count': self._sentbreak_count,
+            'abbrev_types': set(self._params.abbrev_types),
+            'ortho_context': dict(self._params.ortho_context),
+            }
+        out = open(filename, 'wb')
+        try:
+            pickle.dump(checkpoint, out, 2)
+        finally:
+            out.close()
+
+    def load_checkpoint(self, filename):
+        """
+        Replaces the training data of this trainer with that saved in a
+        checkpoint.  Training may then continue with more text; the
+        collocations and sentence starters are found again by
+        ``finalize_training()``.
+
+        :param filename: The name of the checkpoint file.
+        :type filename: str
+        """
+        stream = open(filename, 'rb')
+        try:
+            checkpoint = pickle.load(stream)
+        finally:
+            stream.close()
+        if checkpoint.get('version') != self.CHECKPOINT_VERSION:
+            raise ValueError('Unsupported Punkt checkpoint version: %r' %
+                             checkpoint.get('version'))
+
+        self._type_fdist = FreqDist(checkpoint['type_fdist'])
+        self._num_period_toks = checkpoint['num_period_toks']
+        self._collocation_fdist = FreqDist(checkpoint['collocation_fdist'])
+        self._sent_starter_fdist = FreqDist(checkpoint['sent_starter_fdist'])
+        self._sentbreak_count = checkpoint['sentbreak_count']
+        self._params = PunktParameters()
+        self._params.abbrev_types = set(checkpoint['abbrev_types'])
+        self._params.ortho_context.update(checkpoint['ortho_context'])
+        self._finalized = False
+
     #////////////////////////////////////////////////////////////
     #{ Overhead reduction
     #////////////////////////////////////////////////////////////
@@ -848,15 +1105,17 @@ class PunktTrainer(PunktBaseClass):
     #{ Orthographic data
     #////////////////////////////////////////////////////////////
 
-    def _get_orthography_data(self, tokens):
+    def _get_orthography_data(self, tokens, context='internal'):
         """
         Collect information about whether each token type occurs
         with different case patterns (i) overall, (ii) at
         sentence-initial positions, and (iii) at sentence-internal
         positions.
+
+        :param context: The context of the position before the first
+            token: 'initial', 'internal' or 'unknown'.
+        :return: The context of the position after the last token.
         """
-        # 'initial' or 'internal' or 'unknown'
-        context = 'internal'
         tokens = list(tokens)
 
         for aug_tok in tokens:
@@ -882,15 +1141,22 @@ class PunktTrainer(PunktBaseClass):
                 self._params.add_ortho_context(typ, flag)
 
             # Decide whether the next word is at a sentence boundary.
-            if aug_tok.sentbreak:
-                if not (aug_tok.is_number or aug_tok.is_initial):
-                    context = 'initial'
-                else:
-                    context = 'unknown'
-            elif aug_tok.ellipsis or aug_tok.abbr:
-                context = 'unknown'
-            else:
-                context = 'internal'
+            context = self._next_ortho_context(aug_tok)
+
+        return context
+
+    def _next_ortho_context(self, aug_tok):
+        """
+        Returns the orthographic context ('initial', 'internal' or
+        'unknown') of the position after the given annotated token.
+        """
+        if aug_tok.sentbreak:
+            if not (aug_tok.is_number or aug_tok.is_initial):
+                return 'initial'
+            return 'unknown'
+        elif aug_tok.ellipsis or aug_tok.abbr:
+            return 'unknown'
+        return 'internal'
 
     #////////////////////////////////////////////////////////////
     #{ Abbreviations
@@ -1170,6 +1436,65 @@ class PunktTrainer(PunktBaseClass):
         return sum(1 for aug_tok in tokens if aug_tok.sentbreak)
 
 
+class _PunktShardStatistics(object):
+    """
+    The training data collected from one training text by
+    ``PunktTrainer._shard_statistics()``, to be merged into a trainer.
+    """
+    def __init__(self):
+        self.ortho_context = {}
+        self.sentbreak_count = 0
+        # Plain dicts, as a FreqDist cannot be unpickled.
+        self.sent_starter_fdist = {}
+        self.collocation_fdist = {}
+        self.rare_abbrev_candidates = []
+        """The pairs of tokens that may show a rare abbreviation."""
+        self.first_tok = self.last_tok = None
+        self.parastart = False
+        """Whether the first token starts a paragraph."""
+        self.context = None
+        """The orthographic context after the last token."""
+
+def _count_shard_types(trainer, text):
+    """
+    Returns the frequency distribution of the token types in a training
+    text, and the number of its tokens that end in a period.
+    """
+    types = []
+    num_period_toks = 0
+    for aug_tok in trainer._tokenize_words(text):
+        types.append(aug_tok.type)
+        if aug_tok.period_final:
+            num_period_toks += 1
+    return dict(FreqDist(types)), num_period_toks
+
+def _collect_shard_statistics(trainer, text):
+    """
+    Returns the ``_PunktShardStatistics`` of a training text, or None if
+    it has no tokens.
+    """
+    return trainer._shard_statistics(text)
+
+_shard_worker_trainer = None
+"""The copy of the trainer in a worker process of
+``PunktTrainer.train_parallel()``."""
+
+def _init_shard_worker(trainer):
+    global _shard_worker_trainer
+    _shard_worker_trainer = trainer
+
+class _ShardWorkerFunction(object):
+    """
+    Applies a shard function to a text, with the copy of the trainer
+    in a worker process.
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, text):
+        return self.function(_shard_worker_trainer, text)
+
+
 ######################################################################
 #{ Punkt Sentence Tokenizer
 ######################################################################
@@ -1312,6 +1637,9 @@ class PunktSentenceTokenizer(PunktBaseClass,TokenizerI):
         """
         Returns True if the given text includes a sentence break.
         """
+        if self._has_fast_annotation():
+            return self._fast_contains_sentbreak(text)
+
         found = False # used to ignore last token
         for t in self._annotate_tokens(self._tokenize_words(text)):
             if found:
@@ -1566,6 +1894,159 @@ class PunktSentenceTokenizer(PunktBaseClass,TokenizerI):
         # Otherwise, we're not sure.
         return 'unknown'
 
+    #////////////////////////////////////////////////////////////
+    #{ Fast Annotation
+    #////////////////////////////////////////////////////////////
+    # Every candidate sentence break found by ``_slices_from_text``
+    # is tested with ``text_contains_sentbreak``.  The methods below
+    # make the same decisions as the two annotation passes, but work
+    # on the token strings and a list of first pass annotations,
+    # instead of on ``PunktToken`` objects.  ``debug_decisions`` and
+    # subclasses that customize the token class or the annotation
+    # methods still use the annotation passes.
+
+    def _has_fast_annotation(self):
+        """
+        Returns True if this tokenizer makes its decisions with the
+        default token class and annotation methods, which are what the
+        fast annotation methods reproduce.
+        """
+        cls = self.__class__
+        try:
+            has_fast = _FAST_ANNOTATION_CLASSES[cls]
+        except KeyError:
+            has_fast = _FAST_ANNOTATION_CLASSES[cls] = all(
+                getattr(cls, name).im_func is
+                getattr(PunktSentenceTokenizer, name).im_func
+                for name in _ANNOTATION_METHODS)
+        return has_fast and self._Token is PunktToken
+
+    def _fast_contains_sentbreak(self, text):
+        """
+        Returns True if the given text includes a sentence break, like
+        the annotation passes over ``_tokenize_words(text)`` would.
+        """
+        word_tokenize = self._lang_vars.word_tokenize
+        tokens = []
+        for line in text.split('\n'):
+            tokens.extend(word_tokenize(line))
+
+        annotations = [self._fast_first_pass(tok) for tok in tokens]
+        for i in range(len(tokens) - 1):
+            if self._fast_second_pass(tokens[i], annotations[i],
+                                      tokens[i+1], annotations[i+1]):
+                return True
+        return False
+
+    def _fast_first_pass(self, tok):
+        """
+        Returns the first pass annotation of a token: one of
+        ``_SENTBREAK``, ``_ABBR``, ``_ELLIPSIS``, or 0 for none.  See
+        ``_first_pass_annotation``.
+        """
+        if tok in self._lang_vars.sent_end_chars:
+            return _SENTBREAK
+        if _RE_ELLIPSIS.match(tok):
+            return _ELLIPSIS
+        if tok.endswith('.') and not tok.endswith('..'):
+            typ = tok[:-1].lower()
+            abbrev_types = self._params.abbrev_types
+            if typ in abbrev_types or typ.split('-')[-1] in abbrev_types:
+                return _ABBR
+            return _SENTBREAK
+        return 0
+
+    def _fast_second_pass(self, tok1, annotation1, tok2, annotation2):
+        """
+        Returns True if the first of two contiguous tokens is a sentence
+        break, given their first pass annotations.  See
+        ``_second_pass_annotation``.
+        """
+        sentbreak = annotation1 == _SENTBREAK
+        if not tok1.endswith('.'):
+            return sentbreak
+
+        params = self._params
+        typ = _type_no_period(_token_type(tok1))
+        next_typ = _token_type(tok2)
+        if annotation2 == _SENTBREAK:
+            next_typ = _type_no_period(next_typ)
+        tok_is_initial = _RE_INITIAL.match(tok1)
+
+        # [4.1.2. Collocation Heuristic]
+        if (typ, next_typ) in params.collocations:
+            return False
+
+        # [4.2. Token-Based Reclassification of Abbreviations]
+        if annotation1 in (_ABBR, _ELLIPSIS) and not tok_is_initial:
+            if self._fast_ortho_heuristic(tok2, next_typ) == True:
+                return True
+            if tok2[0].isupper() and next_typ in params.sent_starters:
+                return True
+
+        # [4.3. Token-Based Detection of Initials and Ordinals]
+        if tok_is_initial or typ == '##number##':
+            is_sent_starter = self._fast_ortho_heuristic(tok2, next_typ)
+            if is_sent_starter == False:
+                return False
+            if ( is_sent_starter == 'unknown' and tok_is_initial and
+                 tok2[0].isupper() and
+                 not (params.ortho_context.get(next_typ, 0) & _ORTHO_LC) ):
+                return False
+
+        return sentbreak
+
+    def _fast_ortho_heuristic(self, tok, typ):
+        """
+        Decide whether a token, whose type without a sentence break
+        period is ``typ``, is the first token in a sentence.  See
+        ``_ortho_heuristic``.
+        """
+        if tok in self.PUNCTUATION:
+            return False
+
+        # Unlike indexing, get() does not add the type to ortho_context.
+        ortho_context = self._params.ortho_context.get(typ, 0)
+
+        if ( tok[0].isupper() and
+             (ortho_context & _ORTHO_LC) and
+             not (ortho_context & _ORTHO_MID_UC) ):
+            return True
+
+        if ( tok[0].islower() and
+             ((ortho_context & _ORTHO_UC) or
+              not (ortho_context & _ORTHO_BEG_LC)) ):
+            return False
+
+        return 'unknown'
+
+_ANNOTATION_METHODS = ('text_contains_sentbreak', '_first_pass_annotation',
+                       '_second_pass_annotation', '_ortho_heuristic')
+"""The annotation methods that a tokenizer class must not override, for it
+to use the fast annotation methods."""
+
+_FAST_ANNOTATION_CLASSES = {}
+"""A cache of whether each tokenizer class can use the fast annotation
+methods."""
+
+_SENTBREAK, _ABBR, _ELLIPSIS = 1, 2, 3
+"""The first pass annotations of the fast annotation methods."""
+
+_RE_ELLIPSIS = PunktToken._RE_ELLIPSIS
+_RE_NUMERIC = PunktToken._RE_NUMERIC
+_RE_INITIAL = PunktToken._RE_INITIAL
+
+def _token_type(tok):
+    """Returns the type of a token, like ``PunktToken.type``."""
+    return _RE_NUMERIC.sub('##number##', tok.lower())
+
+def _type_no_period(typ):
+    """Returns a type with its final period removed if it has one, like
+    ``PunktToken.type_no_period``."""
+    if len(typ) > 1 and typ[-1] == '.':
+        return typ[:-1]
+    return typ
+
 
 DEBUG_DECISION_FMT = '''Text: %(text)r (at offset %(period_index)d)
 Sentence break? %(break_decision)s (%(reason)s)
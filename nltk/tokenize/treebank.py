@@ -42,6 +42,16 @@ class TreebankWordTokenizer(TokenizerI):
         >>> TreebankWordTokenizer().tokenize(s)
         ['They', "'ll", 'save', 'and', 'invest', 'more', '.']
 
+    The offsets of the tokens in the original text are found with
+    ``span_tokenize()``.  Double quotes, which are rewritten as ``\`\```
+    or ``''`` tokens, span the original quote character:
+
+        >>> s = '''"Don't," she said.'''
+        >>> TreebankWordTokenizer().tokenize(s)
+        ['``', 'Do', "n't", ',', "''", 'she', 'said', '.']
+        >>> list(TreebankWordTokenizer().span_tokenize(s))
+        [(0, 1), (1, 3), (3, 6), (6, 7), (7, 8), (9, 12), (13, 17), (17, 18)]
+
     NB. this tokenizer assumes that the text is presented as one sentence per line,
     where each line is delimited with a newline character.
     The only periods to be treated as separate tokens are those appearing
@@ -62,6 +72,15 @@ class TreebankWordTokenizer(TokenizerI):
     CONTRACTIONS4 = [re.compile(r"(?i)\b(whad)(dd)(ya)\b"),
                      re.compile(r"(?i)\b(wha)(t)(cha)\b")]
 
+    # The whitespace that separates tokens in the original text: the
+    # characters that ``split()`` separates tokens at, which are only
+    # ASCII whitespace in byte strings.
+    _WHITESPACE = re.compile(r'\s*')
+    _UNICODE_WHITESPACE = re.compile(r'\s*', re.UNICODE)
+
+    # The tokens that replace double quotes in the original text.
+    _QUOTES = ('``', "''")
+
     def tokenize(self, text):
         #starting quotes
         text = re.sub(r'^\"', r'``', text)
@@ -111,6 +130,145 @@ class TreebankWordTokenizer(TokenizerI):
 
         return text.split()
 
+    def span_tokenize(self, text):
+        """
+        Identify the tokens using integer offsets ``(start_i, end_i)``,
+        where ``text[start_i:end_i]`` is the corresponding token.
+
+        :rtype: iter(tuple(int, int))
+        """
+        return iter(self.align_tokens(text, self.tokenize(text)))
+
+    def align_tokens(self, text, tokens):
+        """
+        Find the offsets of the given tokens, as returned by
+        ``tokenize()``, in the original text.  The text is scanned once,
+        from left to right.  A ``\`\``` or ``''`` token that does not
+        appear in the text spans the double quote that it replaced.
+
+        :param text: The text that was tokenized.
+        :type text: str
+        :param tokens: The tokens of *text*.
+        :type tokens: list(str)
+        :rtype: list(tuple(int, int))
+        :raise ValueError: If a token can not be found in the text.
+        """
+        if isinstance(text, unicode):
+            whitespace = self._UNICODE_WHITESPACE
+        else:
+            whitespace = self._WHITESPACE
+        spans = []
+        start = 0
+        for token in tokens:
+            start = whitespace.match(text, start).end()
+            if text.startswith(token, start):
+                end = start + len(token)
+            elif token in self._QUOTES and text.startswith('"', start):
+                end = start + 1
+            else:
+                raise ValueError('Token %r not found at offset %d' %
+                                 (token, start))
+            spans.append((start, end))
+            start = end
+        return spans
+
+class FastTreebankWordTokenizer(TreebankWordTokenizer):
+    """
+    A faster engine for the Treebank tokenizer, which produces exactly the
+    same tokens as ``TreebankWordTokenizer``.
+
+    The rules of the Treebank tokenizer are applied in order, and later
+    rules depend on the spaces inserted by earlier ones, so they can not
+    be merged into a single pattern without changing the output.  Instead,
+    this engine compiles the rules once into a program of passes:
+
+    - every pattern is compiled when the class is defined;
+    - rules that only pad disjoint sets of characters with spaces, and
+      do not interact with the rules between them, share one pass;
+    - each pass is skipped, without copying the text, when the text does
+      not contain the characters that its rule needs in order to match;
+    - the final collapsing of spaces is left to ``str.split()``.
+
+        >>> from nltk.tokenize import FastTreebankWordTokenizer
+        >>> s = '''"Don't," she said. They'll save (and invest) more.'''
+        >>> FastTreebankWordTokenizer().tokenize(s)
+        ['``', 'Do', "n't", ',', "''", 'she', 'said.', 'They', "'ll", 'save',
+        '(', 'and', 'invest', ')', 'more', '.']
+    """
+
+    _STARTING_QUOTE1 = re.compile(r'^\"')
+    _STARTING_QUOTE2 = re.compile(r'(``)')
+    _STARTING_QUOTE3 = re.compile(r'([ (\[{<])"')
+
+    _COLON_COMMA = re.compile(r'([:,])([^\d])')
+    # "...", [;@#$%&] and [?!] are padded in one pass.  Padding "?" and "!"
+    # before the final period rule only changes the character that rule
+    # sees before the period into a space, which does not change the tokens.
+    _PUNCTUATION = re.compile(r'\.\.\.|[;@#$%&?!]')
+    _FINAL_PERIOD = re.compile(r'([^\.])(\.)([\]\)}>"\']*)\s*$')
+    _FINAL_PERIOD_CLOSERS = ']\x29}>"\''
+    _SINGLE_QUOTE = re.compile(r"([^'])' ")
+    _BRACKETS_DASHES = re.compile(r'[\]\[\(\)\{\}\<\>]|--')
+
+    _ENDING_QUOTE1 = re.compile(r'"')
+    _ENDING_QUOTE2 = re.compile(r'(\S)(\'\')')
+    # The empty alternatives of these rules in ``TreebankWordTokenizer``
+    # only double the space after a word, so they are left out.
+    _ENDINGS = [re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "),
+                re.compile(r"([^' ])('ll|'re|'ve|n't) "),
+                re.compile(r"([^' ])('LL|'RE|'VE|N'T) ")]
+
+    # Matches wherever any of CONTRACTIONS2 would match.  None of those
+    # rules can create a match for another, so if this does not match,
+    # all of them can be skipped.
+    _ANY_CONTRACTION2 = re.compile(r"(?i)\b(?:cannot|d'ye|gimme|gonna|gotta|"
+                                   r"lemme|mor'n)\b|\bwanna ")
+
+    def tokenize(self, text):
+        #starting quotes
+        if '"' in text:
+            text = self._STARTING_QUOTE1.sub(r'``', text)
+        if '``' in text:
+            text = self._STARTING_QUOTE2.sub(r' \1 ', text)
+        if '"' in text:
+            text = self._STARTING_QUOTE3.sub(r'\1 `` ', text)
+
+        #punctuation
+        if ':' in text or ',' in text:
+            text = self._COLON_COMMA.sub(r' \1 \2', text)
+        text = self._PUNCTUATION.sub(r' \g<0> ', text)
+        if text.rstrip().rstrip(self._FINAL_PERIOD_CLOSERS).endswith('.'):
+            text = self._FINAL_PERIOD.sub(r'\1 \2\3 ', text)
+        if "' " in text:
+            text = self._SINGLE_QUOTE.sub(r"\1 ' ", text)
+
+        #parens, brackets, etc.
+        text = self._BRACKETS_DASHES.sub(r' \g<0> ', text)
+
+        #add extra space to make things easier
+        text = " " + text + " "
+
+        #ending quotes
+        if '"' in text:
+            text = self._ENDING_QUOTE1.sub(" '' ", text)
+        if "''" in text:
+            text = self._ENDING_QUOTE2.sub(r'\1 \2 ', text)
+
+        # Without a quote, these rules only add spaces where there
+        # already is one.
+        if "'" in text:
+            for regexp in self._ENDINGS:
+                text = regexp.sub(r"\1 \2 ", text)
+
+        if self._ANY_CONTRACTION2.search(text):
+            for regexp in self.CONTRACTIONS2:
+                text = regexp.sub(r' \1 \2 ', text)
+        if "'" in text:
+            for regexp in self.CONTRACTIONS3:
+                text = regexp.sub(r' \1 \2 ', text)
+
+        return text.split()
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod(optionflags=doctest.NORMALIZE_WHITESPACE)
@@ -7,4 +7,13 @@ Spamlibs, a spam-powered mad-lib generator.
 .. automodule:: spam.views
    :members:
    :exclude-members: random
+
+.. automodule:: spam.ingest
+   :members:
+
+.. automodule:: spam.counters
+   :members:
+
+.. automodule:: spam.frontpage
+   :members:
 """
\ No newline at end of file
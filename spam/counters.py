@@ -0,0 +1,113 @@
+"""
+========
+Counters
+========
+
+File: spam/counters.py
+
+Sharded counters for the views and rating of an email. Incrementing a counter
+only writes one small, randomly chosen :class:`spam.models.CounterShard`, so
+popular emails do not serialize on their own entity group, and the large body
+of the email is not rewritten on every view.
+
+The increments are written behind: :func:`rollup` periodically adds them to
+the counted properties of the emails, which are what listings are ordered by.
+"""
+from google.appengine.ext import db
+from models import Email, CounterShard
+from random import randint
+import logging
+
+#: The number of shards of each counter.
+SHARDS = 10
+
+#: The maximum number of emails rolled up by one call to :func:`rollup`.
+ROLLUP_SIZE = 100
+
+def _shard_name(email_key, name, index):
+    """
+    Get the key name of one shard of a counter.
+
+    :param email_key: The key of the email.
+    :param string name: The name of the counted property of the email.
+    :param integer index: The index of the shard.
+    :rtype: string
+    """
+    return '%s:%s:%d' % (name, email_key, index)
+
+def increment(email, name):
+    """
+    Increment a counter of an email, by one.
+
+    :param models.Email email: The email.
+    :param string name: The name of the counted property of the email.
+    """
+    key_name = _shard_name(email.key(), name, randint(0, SHARDS - 1))
+
+    def txn():
+        shard = CounterShard.get_by_key_name(key_name)
+        if shard is None:
+            shard = CounterShard(key_name=key_name, email=email, name=name)
+        shard.count += 1
+        shard.put()
+
+    db.run_in_transaction(txn)
+
+def value(email, name):
+    """
+    Get the current value of a counter of an email, including the increments
+    that have not been rolled up yet. All the shards are fetched in one batch.
+
+    :param models.Email email: The email.
+    :param string name: The name of the counted property of the email.
+    :rtype: integer
+    """
+    key_names = [_shard_name(email.key(), name, index) for index in range(SHARDS)]
+    shards = CounterShard.get_by_key_name(key_names)
+
+    return getattr(email, name) + sum([shard.count for shard in shards if shard is not None])
+
+def rollup():
+    """
+    Add the pending increments of the counters to the counted properties of
+    their emails. The shards of each email and the email itself are updated in
+    one cross-group transaction, so no increment is counted twice or lost.
+
+    :rtype: The number of emails that were updated.
+    """
+    email_keys = set()
+    for shard in CounterShard.all().filter('count >', 0).fetch(ROLLUP_SIZE * SHARDS):
+        email_keys.add(CounterShard.email.get_value_for_datastore(shard))
+        if len(email_keys) == ROLLUP_SIZE:
+            break
+
+    options = db.create_transaction_options(xg=True)
+    for email_key in email_keys:
+        db.run_in_transaction_options(options, _rollup_email, email_key)
+
+    logging.info('Rolled up the counters of %d emails' % len(email_keys))
+
+    return len(email_keys)
+
+def _rollup_email(email_key):
+    """
+    Add the pending increments of the counters of one email to the email. This
+    must be run in a cross-group transaction.
+
+    :param email_key: The key of the email.
+    """
+    email = Email.get(email_key)
+
+    key_names = []
+    for name in ('views', 'rating'):
+        key_names.extend([_shard_name(email_key, name, index) for index in range(SHARDS)])
+
+    shards = [shard for shard in CounterShard.get_by_key_name(key_names) if shard is not None and shard.count > 0]
+    if email is not None:
+        for shard in shards:
+            setattr(email, shard.name, getattr(email, shard.name) + shard.count)
+        email.put()
+
+    for shard in shards:
+        shard.count = 0
+    db.put(shards)
@@ -0,0 +1,131 @@
+"""
+==========
+Front Page
+==========
+
+File: spam/frontpage.py
+
+The front page shows the most recent, most viewed and most popular spam. These
+lists are not queried on every request: a snapshot of them is kept in a cache,
+rebuilt whenever new spam is processed or the counters are rolled up.
+
+A snapshot older than :data:`FRESH_SECONDS` is still served, but a rebuild is
+scheduled in the background (stale-while-revalidate). Only when there is no
+snapshot at all is it built during the request.
+
+The cache used by the application is :data:`store`. Tests and local runs may
+replace it with a :class:`LocalStore`, which keeps the snapshot in a dict.
+"""
+from google.appengine.api import memcache, taskqueue
+from models import Email
+import time
+
+#: The number of spams in each list of the front page.
+LIMIT = 10
+
+#: The number of seconds a snapshot is served without being rebuilt.
+FRESH_SECONDS = 60
+
+#: The number of seconds to wait for a scheduled rebuild, before scheduling another.
+REBUILD_SECONDS = 30
+
+#: The cache key of the snapshot.
+SNAPSHOT_KEY = 'frontpage:snapshot'
+
+#: The cache key that marks that a rebuild has been scheduled.
+REBUILD_KEY = 'frontpage:rebuild'
+
+class MemcacheStore(object):
+    """
+    A cache of front page snapshots, in the AppEngine memcache.
+    """
+
+    def get(self, key):
+        return memcache.get(key)
+
+    def set(self, key, value):
+        memcache.set(key, value)
+
+    def add(self, key, value, seconds):
+        """
+        Store a value, only if there is no value for the key yet.
+
+        :param string key: The cache key.
+        :param value: The value to store.
+        :param integer seconds: The number of seconds until the value expires.
+        :rtype: True if the value was stored.
+        """
+        return memcache.add(key, value, time=seconds)
+
+class LocalStore(object):
+    """
+    An in-process stand-in for :class:`MemcacheStore`.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        value, expires = self.values.get(key, (None, None,))
+        if expires is not None and expires < time.time():
+            return None
+        return value
+
+    def set(self, key, value):
+        self.values[key] = (value, None,)
+
+    def add(self, key, value, seconds):
+        if self.get(key) is not None:
+            return False
+        self.values[key] = (value, time.time() + seconds,)
+        return True
+
+#: The cache of the front page snapshot.
+store = MemcacheStore()
+
+def _summarize(emails):
+    """
+    Get the parts of some emails that are shown on the front page.
+
+    :param list emails: The emails.
+    :rtype: A list of dicts, with the key and the title of each email.
+    """
+    return [{'key':str(email.key()), 'title':email.title} for email in emails]
+
+def rebuild():
+    """
+    Query the lists of the front page, and store them in the cache.
+
+    :rtype: The new snapshot.
+    """
+    recent_spams = Email.all().order('-date').fetch(LIMIT + 1)
+    viewed_spams = Email.all().order('-views').fetch(LIMIT)
+    popular_spams = Email.all().order('-rating').fetch(LIMIT)
+
+    snapshot = {
+        'recent_spams':_summarize(recent_spams[:LIMIT]),
+        'viewed_spams':_summarize(viewed_spams),
+        'popular_spams':_summarize(popular_spams),
+        'more':len(recent_spams) == LIMIT + 1,
+        'built':time.time()
+    }
+    store.set(SNAPSHOT_KEY, snapshot)
+
+    return snapshot
+
+def snapshot():
+    """
+    Get the lists of the front page from the cache. If the cached snapshot is
+    stale, a rebuild is scheduled, and the stale snapshot is returned.
+
+    :rtype: A dict, with the lists of spams under *recent_spams*,
+        *viewed_spams* and *popular_spams*, and whether there are *more*.
+    """
+    cached = store.get(SNAPSHOT_KEY)
+    if cached is None:
+        return rebuild()
+
+    if cached['built'] + FRESH_SECONDS < time.time() and store.add(REBUILD_KEY, True, REBUILD_SECONDS):
+        taskqueue.add(url='/tasks/frontpage')
+
+    return cached
@@ -0,0 +1,108 @@
+"""
+======
+Ingest
+======
+
+File: spam/ingest.py
+
+New email messages are not tokenized and tagged in the request that supplies
+them. Instead, the raw email is stored and its key is added to the ingest
+queue, and a background worker (see :func:`spam.views.ingest_worker`)
+processes the waiting emails in batches.
+
+The queue used by the application is :data:`queue`. Tests and local runs may
+replace it with a :class:`LocalQueue`, which keeps the waiting emails in
+memory until the worker is called directly.
+"""
+from google.appengine.api import taskqueue
+from collections import deque
+import time
+
+#: The number of emails that the worker processes in one request.
+BATCH_SIZE = 10
+
+class IngestQueue(object):
+    """
+    An AppEngine pull queue of the keys of emails waiting to be processed.
+    Adding an email also schedules a push task that runs the worker. Push
+    tasks are named by time, so emails added within a few seconds of each
+    other are processed by the same worker request.
+    """
+
+    def __init__(self, name='ingest', worker_url='/tasks/ingest', delay=5, lease_seconds=300):
+        """
+        :param string name: The name of the pull queue, as defined in queue.yaml.
+        :param string worker_url: The URL of the worker view.
+        :param integer delay: The number of seconds to wait before running the worker.
+        :param integer lease_seconds: The number of seconds the worker may hold a batch.
+        """
+        self.queue = taskqueue.Queue(name)
+        self.worker_url = worker_url
+        self.delay = delay
+        self.lease_seconds = lease_seconds
+
+    def add(self, key):
+        """
+        Add an email to the queue, and make sure a worker will run.
+
+        :param key: The key of the email to process.
+        """
+        self.queue.add(taskqueue.Task(payload=str(key), method='PULL'))
+        self.kick()
+
+    def kick(self):
+        """
+        Schedule the worker to run, unless it is already scheduled.
+        """
+        name = 'ingest-%d' % (time.time() // self.delay)
+        try:
+            taskqueue.add(name=name, url=self.worker_url, countdown=self.delay)
+        except (taskqueue.TaskAlreadyExistsError, taskqueue.TombstonedTaskError):
+            pass
+
+    def lease(self, count):
+        """
+        Lease a batch of emails from the queue.
+
+        :param integer count: The maximum number of emails to lease.
+        :rtype: A list of (task, key) tuples.
+        """
+        tasks = self.queue.lease_tasks(self.lease_seconds, count)
+        return [(task, task.payload) for task in tasks]
+
+    def delete(self, leased):
+        """
+        Remove a batch of processed emails from the queue.
+
+        :param list leased: The (task, key) tuples returned by :meth:`lease`.
+        """
+        if len(leased) > 0:
+            self.queue.delete_tasks([task for task, key in leased])
+
+class LocalQueue(object):
+    """
+    An in-process stand-in for :class:`IngestQueue`. Emails wait in memory
+    until the worker is called, and nothing is scheduled automatically.
+    """
+
+    def __init__(self):
+        self.pending = deque()
+
+    def add(self, key):
+        self.pending.append(str(key))
+
+    def kick(self):
+        pass
+
+    def lease(self, count):
+        leased = []
+        while self.pending and len(leased) < count:
+            key = self.pending.popleft()
+            leased.append( (key, key,) )
+        return leased
+
+    def delete(self, leased):
+        pass
+
+#: The queue of emails waiting to be processed.
+queue = IngestQueue()
@@ -8,7 +8,7 @@ File: spam/models.py
 Classes used to represent Email and Lib objects in Spamlibs. These class objects
 are related to two entity types in the Google AppEngine datastore. The only 
 relationship between the two objects is that one Email entity contains many Lib
-entities.
+entities. The counters of an Email are sharded across CounterShard entities.
 """
 from google.appengine.ext import db
 import re
@@ -32,7 +32,37 @@ class Email(db.Model):
     
     #: How many times has this spam been viewed?
     views = db.IntegerProperty()
-    
+
+    #: The tagged tokens of the body, one ``offset tag token`` triple per line.
+    tags = db.TextProperty()
+
+    def get_tags(self):
+        """
+        Get the tagged tokens of the body, as stored by :meth:`set_tags`.
+
+        :rtype: A list of (token, tag, offset) tuples, or None if the body
+            has not been tagged yet.
+        """
+        if self.tags is None:
+            return None
+
+        tags = []
+        for line in self.tags.split('\n'):
+            if line == '':
+                continue
+            offset, tag, token = line.split(' ', 2)
+            tags.append( (token, tag, int(offset),) )
+        return tags
+
+    def set_tags(self, tags):
+        """
+        Store the tagged tokens of the body. The tokens are not written to the
+        datastore until this email is put.
+
+        :param list tags: A list of (token, tag, offset) tuples.
+        """
+        self.tags = db.Text('\n'.join(['%d %s %s' % (offset, tag, token) for token, tag, offset in tags]))
+
 class Lib(db.Model):
     """
     A lib represents a specific term in an email, the description of its part of 
@@ -51,6 +81,22 @@ class Lib(db.Model):
     #: The description of the language term, as defined by NLTK.
     description = db.StringProperty()
 
+class CounterShard(db.Model):
+    """
+    One shard of a counter of an email, such as its views or its rating. Each
+    shard holds the increments that have not yet been rolled up into the 
+    email, so that popular emails are not rewritten on every increment.
+    """
+    
+    #: An email that this counter belongs to.
+    email = db.ReferenceProperty(Email)
+    
+    #: The name of the counted property of the email.
+    name = db.StringProperty()
+    
+    #: The number of increments waiting to be rolled up.
+    count = db.IntegerProperty(default=0)
+
 class UserSetting(db.Model):
     """
     Settings for individual users. Currently only tests if users can contribute.
@@ -0,0 +1,150 @@
+"""
+========
+Pipeline
+========
+
+File: spam/pipeline.py
+
+Email bodies are tokenized and tagged one sentence at a time: the Treebank
+word tokenizer assumes that its input is a single sentence, and the tagger
+sees each sentence on its own. A body is split into sentences with the Punkt
+sentence tokenizer, the sentences of a batch of bodies are tokenized and tagged
+in chunks of :data:`CHUNK_SIZE`, and every tagged token is located by its
+absolute offset in its body.
+
+When there is more than one chunk, the chunks are tagged in parallel, by a pool
+of :data:`WORKERS` processes. The pool is started on first use, after the
+tagger has been pinned, so the workers share the loaded tagger instead of
+unpickling their own. Where processes cannot be started (as on the AppEngine
+runtime), the chunks are tagged in this process.
+"""
+from nltk.tokenize import FastTreebankWordTokenizer
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+from nltk.tag import batch_pos_tag
+from nltk.data import load, pin
+import logging
+
+#: The resource URL of the sentence tokenizer.
+SENTENCE_TOKENIZER = 'tokenizers/punkt/english.pickle'
+
+#: The number of sentences tagged together by a worker.
+CHUNK_SIZE = 50
+
+#: The number of worker processes, or None for one per CPU. With fewer than
+#: two workers, all the chunks are tagged in this process.
+WORKERS = None
+
+# the tokenizer of sentences
+tokenizer = FastTreebankWordTokenizer()
+
+# the worker pool; None until it is first needed, and False if it cannot be started
+_pool = None
+
+def pin_sentence_tokenizer():
+    """
+    Load the sentence tokenizer, and keep it loaded for the life of this
+    instance.
+
+    :rtype: The sentence tokenizer.
+    """
+    return pin(SENTENCE_TOKENIZER)
+
+
+def _sentence_tokenizer():
+    """
+    Get the sentence tokenizer. Without the trained English model, an untrained
+    Punkt tokenizer is used, which still breaks sentences at periods that do
+    not follow a known abbreviation.
+
+    :rtype: PunktSentenceTokenizer
+    """
+    try:
+        return load(SENTENCE_TOKENIZER)
+    except LookupError:
+        return PunktSentenceTokenizer()
+
+
+def _worker_pool():
+    """
+    Get the worker pool, starting it if needed.
+
+    :rtype: A multiprocessing.Pool, or None if the chunks are tagged in this process.
+    """
+    global _pool
+    if _pool is None:
+        _pool = False
+        try:
+            import multiprocessing
+            workers = WORKERS or multiprocessing.cpu_count()
+            if workers > 1:
+                _pool = multiprocessing.Pool(workers)
+        except Exception, ex:
+            logging.warn('Could not start the tagging workers, tagging in process. %s' % ex)
+    return _pool or None
+
+
+def _tag_chunk(sentences):
+    """
+    Tokenize and tag a chunk of sentences. This runs in the worker processes.
+
+    :param list sentences: The sentence strings.
+    :rtype: A list with a list of (start, end, tag) tuples for each sentence,
+        with offsets relative to the start of the sentence.
+    """
+    tokens = [tokenizer.tokenize(sentence) for sentence in sentences]
+
+    tagged_sentences = []
+    for sentence, sentence_tokens, tags in zip(sentences, tokens, batch_pos_tag(tokens)):
+        spans = tokenizer.align_tokens(sentence, sentence_tokens)
+        tagged_sentences.append([(start, end, tag,) for (token, tag), (start, end) in zip(tags, spans)])
+
+    return tagged_sentences
+
+
+def tag_bodies(inputs):
+    """
+    Tokenize and tag the bodies of several email messages at once, and locate
+    each token in its original input.
+
+    The token in each tuple is the text of the input that it spans, which
+    differs from the tokenizer output for double quotes.
+
+    :param list inputs: The input strings.
+    :rtype: A list with a list of (token, tag, offset) tuples for each input.
+    """
+    sentence_tokenizer = _sentence_tokenizer()
+
+    # the (input index, sentence start) and text of every sentence, in order
+    origins = []
+    sentences = []
+    for index, input in enumerate(inputs):
+        for start, end in sentence_tokenizer.span_tokenize(input):
+            if input[start:end].strip():
+                origins.append((index, start,))
+                sentences.append(input[start:end])
+
+    chunks = [sentences[idx:idx+CHUNK_SIZE] for idx in range(0, len(sentences), CHUNK_SIZE)]
+    pool = len(chunks) > 1 and _worker_pool()
+    if pool:
+        tagged_chunks = pool.map(_tag_chunk, chunks)
+    else:
+        tagged_chunks = [_tag_chunk(chunk) for chunk in chunks]
+
+    tagged_inputs = [[] for input in inputs]
+    tagged_sentences = (tagged for tagged_chunk in tagged_chunks for tagged in tagged_chunk)
+    for (index, offset), tagged in zip(origins, tagged_sentences):
+        input = inputs[index]
+        tagged_inputs[index].extend([(input[offset+start:offset+end], tag, offset + start,) for start, end, tag in tagged])
+
+    return tagged_inputs
+
+
+def tag_body(input):
+    """
+    Tokenize and tag the body of an email message, and locate each token in
+    the original input.
+
+    :param string input: The input string.
+    :rtype: A list of (token, tag, offset) tuples.
+    """
+    return tag_bodies([input])[0]
@@ -14,20 +14,26 @@ Each of the views here is mapped to one URL.
 from django.shortcuts import render_to_response, redirect
 from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.template import RequestContext
-from nltk.tokenize import word_tokenize
-from nltk.tag import pos_tag
 from nltk.data import load
 from random import random
 from models import Email, Lib, UserSetting
 from datetime import datetime
-import logging, math, sys
+import counters, frontpage, ingest, pipeline
+import logging, sys
+from cgi import escape
+from urllib import urlencode
 from google.appengine.api.mail import InboundEmailMessage
+from google.appengine.ext import db
 from google.appengine.ext.db import BadKeyError
+from google.appengine.datastore.datastore_query import Cursor
 from google.appengine.api import users
 
 # load the tagset and help for individual terms
 tagdict = load('help/tagsets/upenn_tagset.pickle')
 
+# the opening span of each tag type in colorized output, with the escaped help
+span_prefixes = dict([(tagtype, '<span data-html="false" data-content="%s" data-placement="bottom" data-trigger="hover">' % escape(tagdict[tagtype][0], True)) for tagtype in tagdict])
+
 # the probability of replacement, per-tag
 repl_prop = {
     'NN': 0.25,
@@ -44,162 +50,234 @@ repl_prop = {
     'CD': 1.0
 }
 
+# the maximum number of entities in one datastore batch operation
+batch_limit = 500
+
+def _put_all(entities):
+    """
+    Write entities to the datastore, in as few batches as possible.
+    
+    :param list entities: The entities to write.
+    """
+    for idx in range(0, len(entities), batch_limit):
+        db.put(entities[idx:idx+batch_limit])
+        
+        
+def _delete_all(keys):
+    """
+    Delete entities from the datastore, in as few batches as possible.
+    
+    :param list keys: The keys of the entities to delete.
+    """
+    for idx in range(0, len(keys), batch_limit):
+        db.delete(keys[idx:idx+batch_limit])
+        
+        
+
 def _colorize_output(input, tags):
     """
     Generate a colorized output of the input, based on the tag types.
     
     :param string input: The input string
-    :param list tags: The tags of the input string
+    :param list tags: The (token, tag, offset) tuples of the input string
     :rtype: An HTML string of colorized output.
     """
-    output = ''
+    output = []
     input_idx = 0
-    tag_idx = 0
-    while tag_idx < len(tags):
-        next_idx = input_idx + len(tags[tag_idx][0])
-        try:
-            tagtype = tags[tag_idx][1]
-            tagdesc = tagdict[tagtype][0]
-            tagdesc = tagdesc.replace('"','&quot;')
-            text = input[input_idx:next_idx]
-            output += '<span data-html="false" data-content="%s" data-placement="bottom" data-trigger="hover">%s</span>' % (tagdesc, text,)
-        except KeyError as ke:
-            output += input[input_idx:next_idx]
-        tag_idx += 1
+    for token, tagtype, offset in tags:
+        next_idx = offset + len(token)
+        output.append(input[input_idx:offset])
+        if tagtype in span_prefixes:
+            output.extend( (span_prefixes[tagtype], input[offset:next_idx], '</span>',) )
+        else:
+            output.append(input[offset:next_idx])
         input_idx = next_idx
         
-        while input_idx < len(input) and (input[input_idx] == ' ' or input[input_idx] == '\r' or input[input_idx] == '\n'):
-            output += input[input_idx]
-            input_idx += 1
+    output.append(input[input_idx:])
     
-    return output
+    return ''.join(output)
     
     
-def _generate_fields(email, input, tags):
+def _generate_fields(email, tags):
     """
-    Generate the terms to swap out, randomly.
+    Generate the terms to swap out, randomly. The libs are not written to the
+    datastore, so that they may be written together with those of other emails.
     
     :param models.Email email: The input email message.
-    :param string input: The input string.
-    :param list tags: The tags of the input string.
+    :param list tags: The (token, tag, offset) tuples of the input string.
+    :rtype: A list of new Lib objects.
     """
-    input_idx = 0
-    for tag in tags:
-        if tag[1] in repl_prop and random() < repl_prop[tag[1]]:
+    libs = []
+    for token, tag, offset in tags:
+        if tag in repl_prop and random() < repl_prop[tag]:
             # make a field
-            lib = Lib(email=email, original=tag[0], position=input_idx, description=tagdict[tag[1]][0])
-            lib.put()
+            libs.append(Lib(email=email, original=token, position=offset, description=tagdict[tag][0]))
             
-        input_idx = input_idx + len(tag[0])
-        while input_idx < len(input) and (input[input_idx] == ' ' or input[input_idx] == '\r' or input[input_idx] == '\n'):
-            input_idx += 1
+    return libs
             
             
-def _process_new(email):
+def _process_new(emails):
+    """
+    Process a batch of new emails, by tokenizing the incoming email messages and
+    generating the fields/terms to lib. The tagged tokens are stored with each
+    email, so a body is only tagged once.
+    
+    Any libs left by an earlier attempt to process an email are replaced.
+    
+    :param list emails: The input email messages.
+    """
+    untagged = [email for email in emails if email.tags is None]
+    for email, tags in zip(untagged, pipeline.tag_bodies([email.body for email in untagged])):
+        email.set_tags(tags)
+    _put_all(untagged)
+    
+    stale = []
+    libs = []
+    for email in emails:
+        stale.extend(Lib.all(keys_only=True).filter('email =', email))
+        libs.extend(_generate_fields(email, email.get_tags()))
+        
+    _delete_all(stale)
+    _put_all(libs)
+    
+    
+def _seed_body(email, values):
     """
-    Process a new email, by tokenizing the incoming email message and generating
-    the fields/terms to lib.
+    Substitute the seeded values for the libs of an email. All the libs are
+    fetched from the datastore in one batch, and any value that is not for a
+    lib of this email is ignored.
     
     :param models.Email email: The input email message.
+    :param dict values: The seeded values, keyed by the key of their lib.
+    :rtype: The body of the email, with the seeded values in place of the libs.
     """
-    tokens = word_tokenize(email.body)
-    tags = pos_tag(tokens)
-    _generate_fields(email, email.body, tags)
+    seeded = {}
+    for lib_key, value in values.items():
+        try:
+            seeded[db.Key(lib_key)] = value
+        except BadKeyError:
+            pass
+            
+    libs = [lib for lib in Lib.get(seeded.keys()) if lib is not None and 
+        Lib.email.get_value_for_datastore(lib) == email.key()]
+    libs.sort(key=lambda lib: lib.position)
+    
+    parts = []
+    bodyidx = 0
+    for lib in libs:
+        parts.append(email.body[bodyidx:lib.position])
+        parts.append(seeded[lib.key()])
+        bodyidx = lib.position + len(lib.original)
+        
+    parts.append(email.body[bodyidx:])
+    
+    return ''.join(parts)
     
     
 def index(request):
     """
     Generate the front page of spamlibs. This shows the 10 most recent spam
-    email messages, and allows users to seed and view them.
+    email messages, and allows users to seed and view them. The lists of spams
+    are served from a cached snapshot, see :mod:`spam.frontpage`.
     
     :param HttpRequest request: A web request.
     :rtype: An HttpResponse object.
     """
-    limit = 10
-    
-    qry = Email.all().order('-date')
-    recent_spams = qry.fetch(limit)
-    
-    count = qry.count(limit=limit+1)
-    
-    qry = Email.all().order('-views')
-    viewed_spams = qry.fetch(limit)
-    
-    qry = Email.all().order('-rating')
-    popular_spams = qry.fetch(limit)
+    snapshot = frontpage.snapshot()
     
     ctx = RequestContext(request, {
-        'recent_spams':recent_spams,
-        'viewed_spams':viewed_spams,
-        'popular_spams':popular_spams,
-        'more':count==limit+1
+        'recent_spams':snapshot['recent_spams'],
+        'viewed_spams':snapshot['viewed_spams'],
+        'popular_spams':snapshot['popular_spams'],
+        'more':snapshot['more']
     })    
     
     return render_to_response('index.html', context_instance=ctx)
 
 
-def _pager(current, total, per_page):
+# the properties that spams may be listed in order of
+list_orders = ('title', 'date', 'rating', 'views')
+
+def _reverse_cursor(cursor):
     """
-    Generate a set of pager context variables for templates to
-    render a nice pagination control.
+    Convert a query cursor, so that it may be used with the same query in the
+    reverse order.
     
-    :param integer current: The current page.
-    :param integer total: The total number of items.
-    :param integer per_page: The number of items per page.
+    :param string cursor: A web-safe query cursor.
+    :rtype: A web-safe query cursor.
+    """
+    return Cursor(urlsafe=cursor).reversed().urlsafe()
+    
+    
+def _pager(order, start, end, backward, full):
+    """
+    Generate a set of pager context variables for templates to
+    render a nice pagination control. The pages are linked by query cursors,
+    and walking back is done by running the query in reverse order.
+    
+    :param string order: The order of the listing.
+    :param string start: The cursor the current page was fetched from, if any.
+    :param string end: The cursor after the current page.
+    :param boolean backward: Was the current page fetched in reverse order?
+    :param boolean full: Did the current page fetch as many items as it could?
     :rtype: dict
     """
-    maxpgs = 5
-       
-    lwrbound = 1
-    if current > maxpgs:
-        lwrbound = current - maxpgs
-        
-    uprbound = math.ceil(float(total) / per_page)
-    if (total-(current * per_page))/per_page >= maxpgs:
-        uprbound = current + maxpgs
-        
     pager = {
-        'pages':[],
-        'less': lwrbound > 1,
-        'more': total > uprbound * per_page 
+        'less': None,
+        'more': None
     }
-
-    for x in range(lwrbound, int(uprbound)+1):
-        pager['pages'].append(x)
+    
+    if backward:
+        if full:
+            pager['less'] = urlencode({'order':order, 'cursor':end, 'dir':'prev'})
+        if start:
+            pager['more'] = urlencode({'order':order, 'cursor':_reverse_cursor(start)})
+    else:
+        if start:
+            pager['less'] = urlencode({'order':order, 'cursor':_reverse_cursor(start), 'dir':'prev'})
+        if full:
+            pager['more'] = urlencode({'order':order, 'cursor':end})
     
     return pager
     
-def list(request, page):
+def list(request):
     """
-    List all the spams in the system, using a paging output.
+    List all the spams in the system, using a paging output. Pages are fetched
+    with query cursors carried in the URL, so deep pages cost no more than the
+    first one.
     
     :param HttpRequest request: A web request.
-    :param integer page: The page to view.
     :rtype: An HttpResponse object.
     """
     pagesize = 10
-    maxfwd = pagesize * 5 + 1
     
     order = 'date'
-    if 'order' in request.GET:
-        tmpo = request.GET['order']
-        if tmpo[0] == '-':
-            tmpo = tmpo[1:]
-        if tmpo in Email.properties():
-            order = request.GET['order']
-    
-    page = int(page)
+    if request.GET.get('order', '').lstrip('-') in list_orders:
+        order = request.GET['order']
+        
+    cursor = request.GET.get('cursor')
+    backward = request.GET.get('dir') == 'prev'
+    
+    # order by key as well, so that the query can be reversed exactly
+    if backward:
+        qry = Email.all().order(order[1:] if order[0] == '-' else '-' + order).order('-__key__')
+    else:
+        qry = Email.all().order(order).order('__key__')
+    
+    try:
+        if cursor:
+            qry.with_cursor(cursor)
+        spams = qry.fetch(pagesize)
+    except (db.BadValueError, db.BadRequestError):
+        raise Http404
         
-    qry = Email.all().order(order)
-    nspams = qry.count(offset=(page-1)*pagesize, limit=maxfwd)
-    spams = qry.fetch(pagesize, offset=(page-1)*pagesize)
+    if backward:
+        spams.reverse()
     
     ctx = RequestContext(request, {
         'spams':spams,
-        'count':maxfwd,
-        'pager':_pager(page, (page-1)*pagesize + nspams, 10),
-        'order':order,
-        'page':page
+        'pager':_pager(order, cursor, qry.cursor(), backward, len(spams) == pagesize),
+        'order':order
     })
     
     return render_to_response('list.html', context_instance=ctx)
@@ -219,18 +297,23 @@ def view(request, key):
     except BadKeyError, ex:
         raise Http404
     
-    email.views += 1
-    email.put()
+    tags = email.get_tags()
+    if tags is None:
+        # emails still waiting in the ingest queue, or supplied before tags
+        # were stored with the email
+        tags = pipeline.tag_body(email.body)
+        email.set_tags(tags)
+        email.put()
+    
+    counters.increment(email, 'views')
     
-    tokens = word_tokenize(email.body)
-    tags = pos_tag(tokens)
     body = _colorize_output(email.body, tags)
     
     ctx = RequestContext(request, {
         'title':email.title, 
         'body':body,
-        'views':email.views,
-        'rating':email.rating
+        'views':counters.value(email, 'views'),
+        'rating':counters.value(email, 'rating')
     })
     
     return render_to_response('output_raw.html', context_instance=ctx)
@@ -266,7 +349,7 @@ def supply(request):
     email = Email(title=title, body=input, date=date, views=0, rating=0)
     email.put()
 
-    _process_new(email)
+    ingest.queue.add(email.key())
     
     return redirect('/view/%s' % email.key())
     
@@ -284,8 +367,7 @@ def rate(request, key):
     except BadKeyError:
         raise Http404
     
-    email.rating += 1;
-    email.put()
+    counters.increment(email, 'rating')
     
     return HttpResponse('OK')
     
@@ -304,8 +386,7 @@ def seed(request, key):
     except BadKeyError:
         raise Http404
         
-    email.views += 1
-    email.put()
+    counters.increment(email, 'views')
         
     if request.method == 'GET':
         libs = Lib.all().filter('email =', email).order('position')
@@ -317,29 +398,14 @@ def seed(request, key):
         
         return render_to_response('seed_fields.html', context_instance=ctx)
         
-    ls = []
-    for l in request.POST.items():
-        ls.append( (l[0], l[1], Lib.get(l[0]),) )
-        
-    ls.sort(cmp=lambda x,y: cmp(x[2].position, y[2].position))
-        
-    newbody = ''
-    bodyidx = 0
-    for l in ls:
-        newbody += email.body[bodyidx:l[2].position]
-        bodyidx = l[2].position
-        
-        newbody += l[1]
-        bodyidx += len(l[2].original)
-    
-    newbody += email.body[bodyidx:]
+    newbody = _seed_body(email, dict(request.POST.items()))
         
     ctx = RequestContext(request, {
         'key':key, 
         'title':email.title,
         'body':newbody,
         'is_processed':True,
-        'views':email.views
+        'views':counters.value(email, 'views')
     })
     return render_to_response('output_raw.html', context_instance=ctx)
     
@@ -393,11 +459,73 @@ def incoming(request):
             email = Email(title=newtitle, body=content, date=date, views=0, rating=0)
             email.put()
             
-            logging.info('Processing new data for tokens & tags')
+            logging.info('Queueing new data for tokens & tags')
             
-            _process_new(email)
+            ingest.queue.add(email.key())
             
     except Exception, ex:
         logging.error('Error processing new email. %s' % ex)
     
-    return render_to_response('msg_receipt.email', mimetype='text/plain')
\ No newline at end of file
+    return render_to_response('msg_receipt.email', mimetype='text/plain')
+    
+def ingest_worker(request):
+    """
+    Process a batch of new email messages waiting in the ingest queue. This is
+    run by the AppEngine task queue, and schedules itself again if there may
+    be more emails waiting.
+    
+    :param HttpRequest request: A web request.
+    :rtype: An HttpResponse object.
+    """
+    leased = ingest.queue.lease(ingest.BATCH_SIZE)
+    emails = [email for email in Email.get([key for task, key in leased]) if email is not None]
+    
+    logging.info('Processing %d new emails for tokens & tags' % len(emails))
+    
+    _process_new(emails)
+    ingest.queue.delete(leased)
+    
+    if len(emails) > 0:
+        frontpage.rebuild()
+        
+    if len(leased) == ingest.BATCH_SIZE:
+        ingest.queue.kick()
+        
+    return HttpResponse('OK')
+    
+def rollup(request):
+    """
+    Add the pending views and ratings of spam emails to the emails, so that
+    they are included in the listings and the front page. This is run periodically by the 
+    AppEngine cron service.
+    
+    :param HttpRequest request: A web request.
+    :rtype: An HttpResponse object.
+    """
+    if counters.rollup() > 0:
+        frontpage.rebuild()
+    
+    return HttpResponse('OK')
+    
+def rebuild_frontpage(request):
+    """
+    Rebuild the cached snapshot of the front page. This is scheduled on the
+    AppEngine task queue when the front page serves a stale snapshot.
+    
+    :param HttpRequest request: A web request.
+    :rtype: An HttpResponse object.
+    """
+    frontpage.rebuild()
+    
+    return HttpResponse('OK')
+    
+def warmup(request):
+    """
+    Respond to an AppEngine warmup request. The POS tagger and the sentence
+    tokenizer are pinned in memory when the application module is loaded, so
+    there is nothing left to do.
+    
+    :param HttpRequest request: A web request.
+    :rtype: An HttpResponse object.
+    """
+    return HttpResponse('OK')
\ No newline at end of file
@@ -5,7 +5,7 @@ URLs
 
 File: urls.py
 
-URL mappings for the endpoints available for Spamlibs. There are only five 
+URL mappings for the endpoints available for Spamlibs. There are only nine 
 endpoints:
 
 * ``/``: The front page.
@@ -13,6 +13,10 @@ endpoints:
 * ``/seed/<key>``: Seed and view a seeded spam message.
 * ``/supply``: Input a new spam email into the application.
 * ``/_ah/mail/<email>``: An AppEngine URL to receive spam email directly.
+* ``/_ah/warmup``: An AppEngine URL to load a new instance before it serves requests.
+* ``/tasks/ingest``: A task queue URL to process new spam email in the background.
+* ``/tasks/rollup``: A cron URL to add pending views and ratings to the spam email.
+* ``/tasks/frontpage``: A task queue URL to rebuild the cached front page.
 """
 from django.conf.urls.defaults import *
 from spam import views
@@ -22,7 +26,7 @@ urlpatterns = patterns('',
     (r'^$', views.index),
     
     # A list of all spams
-    (r'^list/(?P<page>\d*)$', views.list),
+    (r'^list/\d*$', views.list),
     
     # View a specific spam
     (r'^view/(?P<key>.*)$', views.view),
@@ -38,4 +42,16 @@ urlpatterns = patterns('',
     
     # Input an email from an email submission
     (r'^_ah/mail/garbage@spamlibs.appspotmail.com$', views.incoming),
+    
+    # Warm up a new instance before it serves requests
+    (r'^_ah/warmup$', views.warmup),
+    
+    # Process new emails waiting in the ingest queue
+    (r'^tasks/ingest$', views.ingest_worker),
+    
+    # Roll up the pending views and ratings of emails
+    (r'^tasks/rollup$', views.rollup),
+    
+    # Rebuild the cached front page
+    (r'^tasks/frontpage$', views.rebuild_frontpage),
 )